@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import socket
+import hashlib
+import threading
+from contextlib import contextmanager
+import click
+from .config_manager import CONFIG_DIR, ConfigManager
+
+try:
+    import fcntl
+except ImportError: # Windows: fall back to in-process locking only
+    fcntl = None
+
+JOURNAL_FILE = os.path.join(CONFIG_DIR, "action_journal.jsonl")
+# Action types with side effects in Jira; other types are suggestions and are not journaled
+JOURNALED_ACTIONS = ("create_ticket", "transition_ticket", "add_comment")
+IDEMPOTENCY_LABEL_PREFIX = "jira-cli-"
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def idempotency_target(action):
+    """Returns what an Action acts on: the project for new tickets, else the issue (and transition)."""
+    if action.type == "create_ticket":
+        # Without an origin the summary is the only stable identity left
+        return [action.project] if action.origin else [action.project, action.summary]
+    if action.type == "transition_ticket":
+        return [action.issue_key, action.transition_name]
+    return [action.issue_key]
+
+
+def idempotency_key(action):
+    """
+    Returns a stable hash identifying an Action by what it does rather than how it
+    is worded: the change it originates from, its type, its target and its ordinal
+    among that change's actions with the same type and target. A re-run of the same
+    change is therefore recognized however the LLM phrases it, while two tickets
+    suggested for one change still get distinct keys.
+    """
+    canonical = json.dumps([action.origin, action.type, *idempotency_target(action), action.ordinal or 0],
+                           separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def idempotency_label(key):
+    """Returns the Jira label attached to tickets created for an idempotency key."""
+    return f"{IDEMPOTENCY_LABEL_PREFIX}{key[:16]}"
+
+
+class ActionJournal:
+    """
+    Append-only, fsync'd JSONL journal of executed actions, keyed by idempotency hash.
+    A `pending` record is written before an action runs and a `done`/`failed` record
+    after, so an interrupted run can be resumed without repeating side effects.
+    The file is locked while claiming actions, so several processes can share it.
+    """
+    def __init__(self, journal_file_path=None):
+        if not journal_file_path:
+            journal_file_path = ConfigManager().get_value("ACTION_JOURNAL_FILE") or JOURNAL_FILE
+        self.journal_file_path = journal_file_path
+        self._records = {}
+        self._offset = 0
+        self._thread_lock = threading.Lock()
+        self._host = socket.gethostname()
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            with open(self.journal_file_path, "a+") as f:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Reads records appended since the last refresh (including by other processes)."""
+        if not os.path.exists(self.journal_file_path):
+            return
+        with open(self.journal_file_path, "r") as f:
+            f.seek(self._offset)
+            while True:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    break # Incomplete trailing write; re-read it next time
+                self._offset = f.tell()
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                if not isinstance(record, dict) or not isinstance(record.get("key"), str) or "status" not in record:
+                    click.echo(f"Warning: Skipping corrupt journal entry in {self.journal_file_path}", err=True)
+                    continue
+                self._records[record["key"]] = record
+
+    def _append(self, record):
+        with open(self.journal_file_path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _is_live(self, record):
+        """Returns True if a pending record belongs to a process that is still running."""
+        if record.get("host") != self._host or record.get("pid") == os.getpid():
+            return False
+        try:
+            os.kill(record["pid"], 0)
+        except (OSError, KeyError, TypeError):
+            return False
+        return True
+
+    def lookup(self, key):
+        """Returns the latest record for an idempotency key, or None."""
+        with self._locked():
+            self._refresh()
+            return self._records.get(key)
+
+    def claim(self, key, action, force=False):
+        """
+        Atomically claims an action for execution.
+        Returns (claimed, previous_record). An action is not claimed if it is already
+        done (unless `force` is set) or is pending in another live process.
+        """
+        with self._locked():
+            self._refresh()
+            previous = self._records.get(key)
+            if previous and ((previous["status"] == STATUS_DONE and not force) or
+                             (previous["status"] == STATUS_PENDING and self._is_live(previous))):
+                return False, previous
+            self._write(key, STATUS_PENDING, action=action)
+            return True, previous
+
+    def record(self, key, status, **fields):
+        """Appends a status record for an idempotency key."""
+        with self._locked():
+            self._write(key, status, **fields)
+
+    def _write(self, key, status, **fields):
+        record = {"key": key, "status": status, "ts": time.time(), "pid": os.getpid(), "host": self._host, **fields}
+        self._append(record)
+        self._records[key] = record
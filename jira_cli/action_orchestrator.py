@@ -1,23 +1,38 @@
 import click
 import json
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, Tuple
 
+from .action_journal import (ActionJournal, JOURNALED_ACTIONS, STATUS_DONE, STATUS_FAILED, STATUS_PENDING,
+                             idempotency_key, idempotency_label, idempotency_target)
+from .context_features import ComponentIndex, compact_context, extract_jira_keys
 from .github_integration import GitHubIntegration
+from .issue_index import IssueEmbeddingIndex
 from .jira_integration import JiraIntegration
 from .llm_integration import LLMIntegration
+from .models import Action, IssueSummary, dumps, serialize
 from .policy_engine import PolicyEngine
 from .ux import AnimationManager
 
+MAX_REFERENCED_KEYS = 10
+SUGGESTION_REQUEST = "Propose Jira actions based on the provided context. Respond in the specified JSON format."
+
 class ActionOrchestrator:
     def __init__(self, github_integrator: GitHubIntegration, jira_integrator: JiraIntegration, 
-                 llm_integrator: LLMIntegration, policy_engine: PolicyEngine, anim_manager: AnimationManager):
+                 llm_integrator: LLMIntegration, policy_engine: PolicyEngine, anim_manager: AnimationManager,
+                 journal: ActionJournal = None, issue_index: IssueEmbeddingIndex = None):
         self.github_integrator = github_integrator
         self.jira_integrator = jira_integrator
         self.llm_integrator = llm_integrator
         self.policy_engine = policy_engine
         self.anim = anim_manager
+        self.journal = journal
+        self.issue_index = issue_index
+        # Built once so every changed file is mapped with a dict lookup per path segment
+        self.component_index = ComponentIndex(self.policy_engine.get_components())
+        self._project_keys = None
 
-    def suggest_actions(self, pr: int = None, commit: str = None, branch: str = None) -> List[Dict[str, Any]]:
+    def suggest_actions(self, pr: int = None, commit: str = None, branch: str = None) -> List[Action]:
         """
         Orchestrates the process of gathering context, getting LLM suggestions,
         applying policy rules, and preparing actions for user approval.
@@ -48,11 +63,108 @@ class ActionOrchestrator:
         else:
             self.anim.succeed("No GitHub context requested.") # Only relevant if no GitHub options are used
 
+        # Fast path: tickets referenced by key in the branch name or commits need no search or LLM
+        if github_context and self.jira_integrator.jira:
+            referenced_actions = self._suggest_from_referenced_keys(github_context)
+            if referenced_actions:
+                return self._with_origin(referenced_actions, self.github_integrator, github_context)
+
         # 2. Search Jira for similar tickets (only if GitHub context is available, or if other context is later added)
+        jira_issues = self._search_similar_issues(github_context)
+
+        # 3. Call LLM for analysis and suggestions
+        self.anim.start("Asking the LLM for suggestions...")
+        llm_prompt_data = self._build_prompt_data(github_context, jira_issues)
+        llm_prompt_data["request"] = SUGGESTION_REQUEST
+        llm_prompt = dumps(llm_prompt_data)
+        llm_suggestions = self.llm_integrator.call_llm(llm_prompt)
+
+        if not llm_suggestions or not llm_suggestions.get("actions"):
+            self.anim.fail("LLM did not provide any suggestions.")
+            return []
+        self.anim.succeed("LLM analysis complete.")
+
+        # 4. Apply policy to filter/validate LLM suggestions
+        self.anim.start("Applying policy rules...")
+        filtered_suggestions = self._apply_policy_rules(llm_suggestions)
+        self.anim.succeed("Policy rules applied.")
+        
+        if github_context:
+            self._with_origin(filtered_suggestions, self.github_integrator, github_context)
+        return filtered_suggestions
+
+    def suggest_actions_batch(self, prs: List[Tuple[GitHubIntegration, int]]) -> Dict[str, List[Action]]:
+        """
+        Suggests actions for several pull requests, possibly across repositories.
+        `prs` holds (GitHub integrator, PR number) pairs, e.g. from a GitHubRepoRegistry.
+        PRs resolved by the referenced-key fast path skip the LLM; the rest are sent
+        to the LLM together in as few batched prompts as the token budget allows.
+        Returns a dict mapping each 'owner/name#N' label to its policy-filtered actions.
+        """
+        suggestions = {}
+        pending_prompts = {}
+        pending_sources = {}
+        labels = []
+        for github_integrator, pr in prs:
+            label = f"{github_integrator.repo_slug or ''}#{pr}"
+            labels.append(label)
+            if not github_integrator.is_configured:
+                self.anim.fail(f"GitHub integration is not configured. Cannot process PR {label}.")
+                suggestions[label] = []
+                continue
+            self.anim.start(f"Loading GitHub context for PR {label}...")
+            github_context = github_integrator.get_pull_request_context(pr)
+            if not github_context:
+                self.anim.fail(f"Failed to retrieve GitHub context for PR {label}.")
+                suggestions[label] = []
+                continue
+            self.anim.succeed(f"GitHub context for PR {label} loaded.")
+
+            if self.jira_integrator.jira:
+                referenced_actions = self._suggest_from_referenced_keys(github_context)
+                if referenced_actions:
+                    suggestions[label] = self._with_origin(referenced_actions, github_integrator, github_context)
+                    continue
+            pending_prompts[label] = self._build_prompt_data(github_context, self._search_similar_issues(github_context))
+            pending_sources[label] = (github_integrator, github_context)
+
+        if pending_prompts:
+            self.anim.start(f"Asking the LLM for suggestions for {len(pending_prompts)} PR(s)...")
+            llm_results = self.llm_integrator.call_llm_batch(pending_prompts, SUGGESTION_REQUEST)
+            self.anim.succeed("LLM analysis complete.")
+            for label in pending_prompts:
+                suggestions[label] = self._with_origin(self._apply_policy_rules(llm_results.get(label)), *pending_sources[label])
+        return {label: suggestions[label] for label in labels}
+
+    @staticmethod
+    def _with_origin(actions: List[Action], github_integrator, github_context) -> List[Action]:
+        """Stamps actions with the change they were suggested for and their ordinal; see idempotency_key."""
+        repo = github_integrator.repo_slug or ""
+        context_type = github_context.type
+        if context_type == "pull_request":
+            origin = f"{repo}#{github_context.pr_number}"
+        elif context_type == "commit":
+            origin = f"{repo}@{github_context.commit_sha}"
+        else:
+            origin = f"{repo}:{github_context.branch_name}@{github_context.latest_commit_sha}"
+        seen = {}
+        for action in actions:
+            action.origin = origin
+            target = json.dumps([action.type, *idempotency_target(action)])
+            action.ordinal = seen.get(target) or None
+            seen[target] = seen.get(target, 0) + 1
+        return actions
+
+    def _search_similar_issues(self, github_context) -> List[IssueSummary]:
+        if github_context and self._can_use_issue_index():
+            jira_issues = self._search_issue_index(github_context)
+            if jira_issues is not None:
+                return jira_issues
+
         jira_issues = []
         if github_context and self.jira_integrator.jira: # Only search Jira if GitHub context is available and Jira is configured
             self.anim.start("Searching Jira for similar tickets...")
-            search_query_text = github_context.get("title") or github_context.get("message")
+            search_query_text = github_context.search_text
             if search_query_text:
                 search_query = f'text ~ "{search_query_text}"'
                 jira_issues = self.jira_integrator.search_issues(search_query, max_results=5)
@@ -61,32 +173,113 @@ class ActionOrchestrator:
             self.anim.fail("Jira integration not configured. Skipping Jira search.")
         else:
             self.anim.succeed("No GitHub context for Jira search.")
+        return jira_issues
 
-        # 3. Call LLM for analysis and suggestions
-        self.anim.start("Asking the LLM for suggestions...")
+    def _can_use_issue_index(self) -> bool:
+        return bool(self.issue_index) and self.issue_index.is_available and self.llm_integrator.has_embeddings
+
+    def _search_issue_index(self, github_context):
+        """
+        Finds similar tickets in the local embedding index instead of running a live JQL search.
+        Returns None if the query could not be embedded, so the caller falls back to JQL.
+        """
+        query_text = "\n\n".join(filter(None, [github_context.search_text, getattr(github_context, "description", None)]))
+        if not query_text:
+            return []
+        self.anim.start("Searching the local issue index for similar tickets...")
+        embeddings = self.llm_integrator.embed([query_text])
+        if not embeddings:
+            self.anim.fail("Could not embed the GitHub context. Falling back to Jira search.")
+            return None
+        matches = self.issue_index.query(embeddings[0], k=5)
+        if matches is None:
+            self.anim.fail("The local issue index cannot be used. Falling back to Jira search.")
+            return None
+        self.anim.succeed(f"Found {len(matches)} potential Jira issue(s) in the local index.")
+        return [
+            IssueSummary(issue["key"], issue["summary"], issue["description"], None, round(score, 3))
+            for issue, score in matches
+        ]
+
+    def _build_prompt_data(self, github_context, jira_issues: List[IssueSummary]) -> Dict[str, Any]:
+        """Builds the per-context part of the LLM prompt; the request text is added by the caller."""
         llm_prompt_data = {
-            "jira_issues_found": [{"key": issue.key, "summary": issue.fields.summary, "description": issue.fields.description} for issue in jira_issues],
-            "request": "Propose Jira actions based on the provided context. Respond in the specified JSON format."
+            "jira_issues_found": [serialize(issue, exclude=("status",)) for issue in jira_issues],
         }
         if github_context: # Only add github_context if it exists
-            llm_prompt_data["github_context"] = github_context
-            
-        llm_prompt = json.dumps(llm_prompt_data)
-        llm_suggestions = self.llm_integrator.call_llm(llm_prompt)
+            # Send a compact feature summary of the changed files rather than the raw file list
+            llm_prompt_data["github_context"] = compact_context(github_context, self.component_index, self._jira_projects())
+        return llm_prompt_data
 
-        if not llm_suggestions or not llm_suggestions.get("actions"):
-            self.anim.fail("LLM did not provide any suggestions.")
+    def _jira_projects(self) -> Optional[set]:
+        """
+        Returns the project keys that Jira keys in the GitHub context must belong to:
+        the policy's `jira_projects`, or else every project visible in Jira. Returns
+        None (no filtering) while the projects are unknown; only a non-empty result
+        is cached, so a failed lookup is retried for the next context.
+        """
+        if self._project_keys is None:
+            project_keys = self.policy_engine.get_jira_projects() or self.jira_integrator.get_project_keys()
+            if project_keys:
+                self._project_keys = set(project_keys)
+        return self._project_keys
+
+    def _suggest_from_referenced_keys(self, github_context) -> List[Action]:
+        """
+        Builds actions by rule for Jira keys referenced in the GitHub context
+        (e.g. a `feature/PROJ-123-foo` branch or `PROJ-123` in commit messages).
+        Returns an empty list when the rules are inconclusive, so the caller falls back to the LLM.
+        """
+        keys = extract_jira_keys(*github_context.reference_texts(), projects=self._jira_projects())[:MAX_REFERENCED_KEYS]
+        if not keys:
             return []
-        self.anim.succeed("LLM analysis complete.")
 
-        # 4. Apply policy to filter/validate LLM suggestions
+        self.anim.start(f"Resolving referenced Jira key(s): {', '.join(keys)}...")
+        issues = self.jira_integrator.get_issues_by_keys(keys)
+        if not issues:
+            self.anim.fail("No referenced Jira issues found. Falling back to search and LLM.")
+            return []
+        self.anim.succeed(f"Resolved {len(issues)} referenced Jira issue(s).")
+
+        comment_body = self._reference_comment(github_context)
+        actions = []
+        for issue in issues:
+            actions.append(Action.create(
+                "use_existing_ticket",
+                issue_key=issue.key,
+                similarity=1.0,
+                reason=f"{issue.key} is referenced directly in the branch name or commit messages.",
+            ))
+            if self.policy_engine.is_state_blocked(issue.status):
+                continue
+            if comment_body:
+                actions.append(Action.create("add_comment", issue_key=issue.key, comment_body=comment_body))
+            # Only propose a transition when the policy leaves exactly one way forward
+            next_states = self.policy_engine.get_allowed_transitions().get(issue.status, [])
+            if len(next_states) == 1:
+                actions.append(Action.create("transition_ticket", issue_key=issue.key, transition_name=next_states[0]))
+
         self.anim.start("Applying policy rules...")
-        filtered_suggestions = self._apply_policy_rules(llm_suggestions)
+        filtered_actions = self._apply_policy_rules({"actions": actions})
+        if not filtered_actions:
+            self.anim.fail("Policy rejected all rule-based actions. Falling back to search and LLM.")
+            return []
         self.anim.succeed("Policy rules applied.")
-        
-        return filtered_suggestions
+        return filtered_actions
 
-    def _apply_policy_rules(self, llm_suggestions: Dict[str, Any]) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _reference_comment(github_context) -> str:
+        context_type = github_context.type
+        if context_type == "pull_request":
+            return f"Referenced in pull request #{github_context.pr_number}: {github_context.title}"
+        if context_type == "commit":
+            subject = (github_context.message or "").splitlines()[:1]
+            return f"Referenced in commit {github_context.commit_sha}: {subject[0] if subject else ''}".rstrip(": ")
+        if context_type == "branch":
+            return f"Referenced in branch {github_context.branch_name} (latest commit {github_context.latest_commit_sha})"
+        return ""
+
+    def _apply_policy_rules(self, llm_suggestions: Dict[str, Any]) -> List[Action]:
         """
         Filters LLM suggestions based on configured policy rules.
         """
@@ -98,27 +291,27 @@ class ActionOrchestrator:
         # TODO: Implement more granular policy checks (e.g., specific transitions, blocked states)
 
         for action in llm_suggestions["actions"]:
-            action_type = action.get("type")
+            action_type = action.type
             if action_type and self.policy_engine.is_action_allowed(action_type):
                 # Placeholder for more complex policy validation
                 # e.g., validate transition based on allowed_transitions, check blocked_states
                 if action_type == "use_existing_ticket":
-                    if action.get("similarity", 0) >= self.policy_engine.get_similarity_threshold():
+                    if (action.similarity or 0) >= self.policy_engine.get_similarity_threshold():
                         filtered_actions.append(action)
                     else:
-                        click.echo(f"Policy: Rejecting 'use_existing_ticket' due to low similarity ({action.get('similarity', 0)} < {self.policy_engine.get_similarity_threshold()}).", err=True)
+                        click.echo(f"Policy: Rejecting 'use_existing_ticket' due to low similarity ({action.similarity or 0} < {self.policy_engine.get_similarity_threshold()}).", err=True)
                 else:
                     filtered_actions.append(action)
             else:
                 click.echo(f"Policy: Rejecting action type '{action_type}' as it is not allowed by policy.", err=True)
         return filtered_actions
 
-    def _execute_create_ticket(self, action: Dict[str, Any]) -> bool:
-        project = action.get("project", "YOUR_DEFAULT_JIRA_PROJECT") # TODO: Make configurable
-        summary = action.get("summary")
-        description = action.get("description")
-        issue_type = action.get("issue_type", "Task")
-        labels = action.get("labels")
+    def _execute_create_ticket(self, action: Action, extra_labels: List[str] = None) -> bool:
+        project = action.project or "YOUR_DEFAULT_JIRA_PROJECT" # TODO: Make configurable
+        summary = action.summary
+        description = action.description
+        issue_type = action.issue_type or "Task"
+        labels = (action.labels or []) + (extra_labels or []) or None
         if summary and description:
             new_issue = self.jira_integrator.create_issue(project, summary, description, issue_type, labels)
             if new_issue:
@@ -127,9 +320,9 @@ class ActionOrchestrator:
         self.anim.fail("Failed to create Jira ticket.")
         return False
 
-    def _execute_transition_ticket(self, action: Dict[str, Any]) -> bool:
-        issue_key = action.get("issue_key")
-        transition_name = action.get("transition_name")
+    def _execute_transition_ticket(self, action: Action) -> bool:
+        issue_key = action.issue_key
+        transition_name = action.transition_name
         if issue_key and transition_name:
             if self.policy_engine.is_transition_allowed(self.jira_integrator.get_issue_status(issue_key), transition_name):
                 if self.jira_integrator.transition_issue(issue_key, transition_name):
@@ -141,9 +334,9 @@ class ActionOrchestrator:
         self.anim.fail("Failed to transition Jira ticket.")
         return False
 
-    def _execute_add_comment(self, action: Dict[str, Any]) -> bool:
-        issue_key = action.get("issue_key")
-        comment_body = action.get("comment_body")
+    def _execute_add_comment(self, action: Action) -> bool:
+        issue_key = action.issue_key
+        comment_body = action.comment_body
         if issue_key and comment_body:
             if self.jira_integrator.add_comment(issue_key, comment_body):
                 self.anim.succeed(f"Successfully added comment to Jira ticket {issue_key}")
@@ -151,11 +344,58 @@ class ActionOrchestrator:
         self.anim.fail("Failed to add comment to Jira ticket.")
         return False
 
-    def execute_action(self, action: Dict[str, Any]) -> bool:
+    def execute_action(self, action: Action, force: bool = False) -> bool:
+        """
+        Executes a given action, going through the action journal for actions with side effects.
+        `force` re-executes an action the journal records as done.
+        """
+        if self.journal and action.type in JOURNALED_ACTIONS:
+            return self._execute_journaled(action, force)
+        return self._dispatch_action(action)
+
+    def _execute_journaled(self, action: Action, force: bool = False) -> bool:
+        """
+        Executes an action at most once per idempotency key.
+        Actions already recorded as done are skipped unless `force` is set; actions
+        left pending by an interrupted run are checked against Jira before being re-executed.
+        """
+        key = idempotency_key(action)
+        claimed, previous = self.journal.claim(key, serialize(action), force=force)
+        if not claimed:
+            if previous["status"] == STATUS_DONE:
+                self.anim.succeed(f"Skipping '{action.type}': already executed according to the action journal.")
+                return True
+            self.anim.fail(f"Skipping '{action.type}': it is being executed by another process.")
+            return False
+
+        if previous and previous["status"] == STATUS_PENDING and self._is_already_applied(action, key):
+            self.journal.record(key, STATUS_DONE, recovered=True)
+            self.anim.succeed(f"'{action.type}' was applied before an interruption. Recorded as done.")
+            return True
+
+        if action.type == "create_ticket":
+            # The label lets an interrupted run find the ticket instead of creating a duplicate
+            succeeded = self._execute_create_ticket(action, extra_labels=[idempotency_label(key)])
+        else:
+            succeeded = self._dispatch_action(action)
+        self.journal.record(key, STATUS_DONE if succeeded else STATUS_FAILED)
+        return succeeded
+
+    def _is_already_applied(self, action: Action, key: str) -> bool:
+        """Checks Jira for the side effect of an action whose outcome was not journaled."""
+        action_type = action.type
+        if action_type == "create_ticket":
+            return bool(self.jira_integrator.search_issues(f'labels = "{idempotency_label(key)}"', max_results=1))
+        if action_type == "add_comment":
+            return self.jira_integrator.has_comment(action.issue_key, action.comment_body)
+        # Transitions are re-validated against the current status, so re-running them is safe
+        return False
+
+    def _dispatch_action(self, action: Action) -> bool:
         """
         Executes a given action by dispatching to specific helper methods.
         """
-        action_type = action.get("type")
+        action_type = action.type
         if action_type == "create_ticket":
             return self._execute_create_ticket(action)
         elif action_type == "transition_ticket":
@@ -163,14 +403,21 @@ class ActionOrchestrator:
         elif action_type == "add_comment":
             return self._execute_add_comment(action)
         elif action_type == "use_existing_ticket":
-            issue_key = action.get("issue_key")
+            issue_key = action.issue_key
             self.anim.succeed(f"Acknowledged suggestion to use existing Jira ticket: {issue_key}")
             return True # This action type is just a suggestion, no execution needed.
         else:
             self.anim.fail(f"Unknown action type: {action_type}")
             return False
 
-    def present_and_execute_actions(self, suggested_actions: List[Dict[str, Any]]):
+    def _journaled_done_record(self, action: Action):
+        """Returns the journal record of an action already executed for the same change, or None."""
+        if not self.journal or action.type not in JOURNALED_ACTIONS:
+            return None
+        record = self.journal.lookup(idempotency_key(action))
+        return record if record and record["status"] == STATUS_DONE else None
+
+    def present_and_execute_actions(self, suggested_actions: List[Action]):
         """
         Presents suggested actions to the user for approval and executes them if approved.
         """
@@ -180,29 +427,41 @@ class ActionOrchestrator:
 
         click.echo("\n--- Proposed Jira Actions ---")
         for i, action in enumerate(suggested_actions):
-            click.echo(f"\nAction {i+1} (Type: {action.get('type')}):")
-            click.echo(json.dumps(action, indent=2))
+            click.echo(f"\nAction {i+1} (Type: {action.type}):")
+            click.echo(dumps(action, indent=2))
             
             # Simple editing mechanism
             edit_choice = click.prompt("Do you want to edit this action? (y/N)", default="n").lower()
             if edit_choice == 'y':
-                edited_json = click.edit(json.dumps(action, indent=2))
+                edited_json = click.edit(dumps(action, indent=2))
                 if edited_json:
                     try:
-                        action = json.loads(edited_json)
+                        origin, ordinal = action.origin, action.ordinal
+                        action = Action.from_dict(json.loads(edited_json))
+                        # Edits change the action, not the change it was suggested for
+                        action.origin, action.ordinal = origin, ordinal
                         click.echo(click.style("Action updated after editing.", fg='green'))
-                    except json.JSONDecodeError:
-                        self.anim.fail("Invalid JSON provided. Using original action.")
+                    except (json.JSONDecodeError, ValueError):
+                        self.anim.fail("Invalid action provided. Using original action.")
 
-            if action.get("type") == "use_existing_ticket":
+            if action.type == "use_existing_ticket":
                 # For 'use_existing_ticket', it's a suggestion, not an execution.
                 # We simply acknowledge it.
-                if click.confirm(f"Acknowledge suggestion to use existing ticket {action.get('issue_key')}?"):
+                if click.confirm(f"Acknowledge suggestion to use existing ticket {action.issue_key}?"):
                     self.execute_action(action) # Will just print acknowledgment
                 else:
                     self.anim.fail("Suggestion to use existing ticket rejected.")
             else:
-                if click.confirm("Approve this action for execution?"):
+                done_record = self._journaled_done_record(action)
+                if done_record:
+                    executed_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(done_record["ts"]))
+                    click.echo(f"Note: An action like this was already executed for {action.origin or 'this change'} "
+                               f"on {executed_at} according to the action journal.")
+                    if click.confirm("Execute it again?", default=False):
+                        self.execute_action(action, force=True)
+                    else:
+                        self.anim.succeed("Skipped: already executed.")
+                elif click.confirm("Approve this action for execution?"):
                     self.execute_action(action)
                 else:
                     self.anim.fail("Action rejected by user.")
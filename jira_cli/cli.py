@@ -1,11 +1,14 @@
 import click
 import json
 from importlib.metadata import version
-from .github_integration import GitHubIntegration
+from .github_integration import GitHubRepoRegistry, parse_pr_reference, repo_slug_from_webhook
+from .git_integration import LocalGitIntegration
 from .jira_integration import JiraIntegration
 from .llm_integration import LLMIntegration
 from .policy_engine import PolicyEngine
 from .action_orchestrator import ActionOrchestrator
+from .action_journal import ActionJournal
+from .issue_index import IssueEmbeddingIndex
 from .config_manager import ConfigManager
 from .ux import AnimationManager
 
@@ -68,7 +71,10 @@ def config():
         llm_model = click.prompt(f"{llm_provider.capitalize()} Model", default=existing_config.get("LLM_MODEL", default_model))
         llm_api_key = click.prompt(f"{llm_provider.capitalize()} API Key", default=existing_config.get("LLM_API_KEY"), hide_input=True)
 
+    # Merge into the existing file so settings that are only edited by hand
+    # (RATE_LIMITS, HTTP_TRANSPORT, GITHUB_REPOS, ...) are preserved
     new_config = {
+        **existing_config,
         "JIRA_SERVER": jira_server,
         "JIRA_USERNAME": jira_username,
         "JIRA_API_TOKEN": jira_api_token,
@@ -85,11 +91,14 @@ def config():
 
 
 @cli.command()
-@click.option('--pr', type=int, help='GitHub Pull Request number.')
+@click.option('--pr', type=str, multiple=True, help='GitHub Pull Request number, or owner/name#N for another repository. Repeat to process several PRs with batched LLM calls.')
 @click.option('--commit', type=str, help='GitHub Commit reference (SHA).')
 @click.option('--branch', type=str, help='GitHub Branch name.')
+@click.option('--repo', type=str, help='GitHub repository as owner/name. Overrides the configured repository.')
+@click.option('--event-payload', type=click.File('r'), help='GitHub webhook/event payload (JSON) to take the repository from.')
+@click.option('--local', is_flag=True, help='Builds context from the local git checkout instead of the GitHub API.')
 @click.option('--no-animation', is_flag=True, help='Disables CLI animations and spinners.')
-def suggest(pr, commit, branch, no_animation):
+def suggest(pr, commit, branch, repo, event_payload, local, no_animation):
     """
     Suggests Jira actions based on GitHub context.
     """
@@ -97,16 +106,56 @@ def suggest(pr, commit, branch, no_animation):
     anim_manager.show_banner()
 
     # Ensure only one of --pr, --commit, or --branch is provided
-    provided_options = sum([1 for x in [pr, commit, branch] if x is not None])
+    provided_options = sum([1 for x in [pr or None, commit, branch] if x is not None])
     if provided_options > 1:
         anim_manager.fail("Error: Please provide only one of --pr, --commit, or --branch.")
         raise click.Abort()
     elif provided_options == 0:
         anim_manager.fail("Error: Please provide at least one of --pr, --commit, or --branch.")
         raise click.Abort()
+    if local and len(pr) > 1:
+        anim_manager.fail("Error: --local supports a single --pr, since it reads the checked-out branch.")
+        raise click.Abort()
+
+    try:
+        pr_refs = [parse_pr_reference(value) for value in pr]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--pr")
+    if local and any(slug for slug, _ in pr_refs):
+        raise click.BadParameter("--local reads the checked-out repository and cannot take owner/name#N.", param_hint="--pr")
+    if local and (repo or event_payload):
+        raise click.BadParameter("--local reads the checked-out repository and cannot be combined with --repo or --event-payload.",
+                                 param_hint="--local")
+
+    if event_payload and not repo:
+        try:
+            repo = repo_slug_from_webhook(json.load(event_payload))
+        except json.JSONDecodeError as e:
+            raise click.BadParameter(f"Invalid JSON: {e}", param_hint="--event-payload")
+        if not repo:
+            raise click.BadParameter("The payload does not reference a repository.", param_hint="--event-payload")
 
     # Initialize all components
-    github_integrator = GitHubIntegration()
+    pr_targets = []
+    if local:
+        github_integrator = LocalGitIntegration()
+        if not github_integrator.is_configured:
+            anim_manager.fail("Error: --local requires running inside a git repository.")
+            raise click.Abort()
+    else:
+        # All repositories share one pooled session and rate-limit budget
+        try:
+            registry = GitHubRepoRegistry()
+        except ValueError as e:
+            anim_manager.fail(f"Error: Invalid GITHUB_REPOS entry in the config file: {e}")
+            raise click.Abort()
+        try:
+            github_integrator = registry.get(repo)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--repo")
+        pr_targets = [(registry.get(slug) if slug else github_integrator, number) for slug, number in pr_refs]
+        if len(pr_targets) == 1:
+            github_integrator = pr_targets[0][0]
     jira_integrator = JiraIntegration()
     llm_integrator = LLMIntegration()
     policy_engine = PolicyEngine(policy_file_path="jira-ai-cli/policy.yaml") # Specify path relative to project root
@@ -117,15 +166,55 @@ def suggest(pr, commit, branch, no_animation):
         jira_integrator=jira_integrator,
         llm_integrator=llm_integrator,
         policy_engine=policy_engine,
-        anim_manager=anim_manager
+        anim_manager=anim_manager,
+        journal=ActionJournal(),
+        issue_index=IssueEmbeddingIndex()
     )
 
-    suggested_actions = orchestrator.suggest_actions(pr=pr, commit=commit, branch=branch)
+    if len(pr_targets) > 1:
+        for label, suggested_actions in orchestrator.suggest_actions_batch(pr_targets).items():
+            click.echo(f"\n=== PR {label} ===")
+            if suggested_actions:
+                orchestrator.present_and_execute_actions(suggested_actions)
+            else:
+                anim_manager.fail(f"Orchestrator did not suggest any actions for PR {label} after applying policies.")
+        return
+
+    suggested_actions = orchestrator.suggest_actions(pr=pr_refs[0][1] if pr_refs else None, commit=commit, branch=branch)
 
     if suggested_actions:
         orchestrator.present_and_execute_actions(suggested_actions)
     else:
         anim_manager.fail("Orchestrator did not suggest any actions after applying policies.")
 
+@cli.command()
+@click.option('--jql', type=str, help='JQL selecting the issues to index. Defaults to issues updated within the policy lookback window.')
+@click.option('--rebuild', is_flag=True, help='Discards the existing index and re-embeds every issue.')
+def index(jql, rebuild):
+    """
+    Syncs Jira issues into the local embedding index used to find similar tickets.
+    Only new issues and issues whose summary or description changed are re-embedded.
+    """
+    llm_integrator = LLMIntegration()
+    if not llm_integrator.has_embeddings:
+        click.echo("Error: No embedding model configured. Set LLM_EMBEDDING_MODEL in the config file.", err=True)
+        raise click.Abort()
+    jira_integrator = JiraIntegration()
+    if not jira_integrator.jira:
+        raise click.Abort()
+
+    if not jql:
+        policy_engine = PolicyEngine(policy_file_path="jira-ai-cli/policy.yaml")
+        jql = f"updated >= -{policy_engine.get_lookback_days()}d ORDER BY updated DESC"
+    issues = jira_integrator.search_issues(jql, max_results=False)
+    issue_data = [{"key": issue.key, "summary": issue.summary, "description": issue.description} for issue in issues]
+
+    # A rebuild is written next to the current index and only swapped in once it succeeds
+    embedded = IssueEmbeddingIndex().sync(issue_data, llm_integrator.embed, rebuild=rebuild)
+    if embedded is None:
+        click.echo("Error: Failed to update the issue index.", err=True)
+        raise click.Abort()
+    click.echo(click.style(f"Indexed {len(issue_data)} issue(s); {embedded} (re-)embedded.", fg='green'))
+
 if __name__ == '__main__':
     cli()
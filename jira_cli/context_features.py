@@ -0,0 +1,86 @@
+import re
+from collections import Counter
+from .models import serialize
+
+# Jira issue keys, e.g. PROJ-123
+JIRA_KEY_PATTERN = re.compile(r"\b([A-Z][A-Z0-9_]+-[1-9][0-9]*)\b")
+TEST_PATH_PATTERN = re.compile(
+    r"(^|/)(tests?|__tests__|spec|specs)/|(^|/)test_[^/]+$|_test\.[^/.]+$|\.(test|spec)\.[^/]+$"
+)
+MAX_COMPONENTS = 10
+MAX_PROMPT_COMMITS = 50
+ROOT_COMPONENT = "(root)"
+
+
+class ComponentIndex:
+    """
+    Maps file paths to components by their longest matching path prefix.
+    Prefixes come from the `components` section of the policy file; paths that
+    match no prefix fall back to their top-level directory.
+    """
+    def __init__(self, mapping=None):
+        self._prefixes = {prefix.strip("/"): component for prefix, component in (mapping or {}).items()}
+
+    def component_for(self, path):
+        parts = path.strip("/").split("/")
+        for depth in range(len(parts), 0, -1):
+            component = self._prefixes.get("/".join(parts[:depth]))
+            if component:
+                return component
+        return parts[0] if len(parts) > 1 else ROOT_COMPONENT
+
+
+def extract_jira_keys(*texts, projects=None):
+    """
+    Returns the distinct Jira keys found in `texts`, in order of first appearance.
+    If `projects` is given, only keys of those projects are returned, which drops
+    look-alikes such as UTF-8 or SHA-256.
+    """
+    keys = []
+    for text in texts:
+        for key in JIRA_KEY_PATTERN.findall(text or ""):
+            if key not in keys and (projects is None or key.rpartition("-")[0] in projects):
+                keys.append(key)
+    return keys
+
+
+def summarize_changes(context, index, projects=None):
+    """
+    Computes a compact feature summary of a context's changed files:
+    churn per component, test vs. source split and referenced Jira keys.
+    """
+    files = context.files
+    churn = Counter()
+    additions = deletions = test_files = 0
+    for f in files:
+        additions += f.additions
+        deletions += f.deletions
+        churn[index.component_for(f.filename)] += f.additions + f.deletions
+        if TEST_PATH_PATTERN.search(f.filename):
+            test_files += 1
+
+    source_files = len(files) - test_files
+    return {
+        "files_changed": len(files),
+        "additions": additions,
+        "deletions": deletions,
+        "components": dict(churn.most_common(MAX_COMPONENTS)),
+        "test_files": test_files,
+        "source_files": source_files,
+        "test_ratio": round(test_files / source_files, 2) if source_files else None,
+        "jira_keys": extract_jira_keys(*context.texts(), projects=projects),
+    }
+
+
+def compact_context(context, index, projects=None):
+    """
+    Returns the prompt form of a GitHub context: the raw file list is replaced
+    by its feature summary and long commit lists are truncated.
+    """
+    compact = serialize(context, exclude=("files",))
+    compact["change_summary"] = summarize_changes(context, index, projects)
+    commit_messages = getattr(context, "commit_messages", None)
+    if commit_messages and len(commit_messages) > MAX_PROMPT_COMMITS:
+        compact["commit_messages"] = commit_messages[:MAX_PROMPT_COMMITS]
+        compact["omitted_commits"] = len(commit_messages) - MAX_PROMPT_COMMITS
+    return compact
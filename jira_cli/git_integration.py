@@ -0,0 +1,194 @@
+import os
+import json
+import subprocess
+import click
+from .models import BranchContext, ChangedFile, CommitContext, PRContext
+
+# Separates commit messages in `git log` output; cannot appear in a message
+COMMIT_SEPARATOR = "\x1e"
+
+
+class LocalGitIntegration:
+    """
+    Builds PR, commit and branch contexts from a local git checkout instead of the
+    GitHub REST API. Returns the same context objects as GitHubIntegration, with no
+    network round trips or rate-limit cost.
+    """
+    def __init__(self, repo_path=None):
+        self.repo_path = repo_path if repo_path else os.getcwd()
+
+    @property
+    def is_configured(self):
+        return self._git("rev-parse", "--is-inside-work-tree", quiet=True) == "true"
+
+    @property
+    def repo_slug(self):
+        """'owner/name' from GITHUB_REPOSITORY in Actions, else from the `origin` remote URL."""
+        slug = os.environ.get("GITHUB_REPOSITORY")
+        if slug:
+            return slug
+        url = self._git("remote", "get-url", "origin", quiet=True)
+        if not url:
+            return None
+        # Handles https://github.com/owner/name(.git) and git@github.com:owner/name(.git)
+        parts = url.rstrip("/").replace(":", "/").split("/")
+        if len(parts) < 2:
+            return None
+        name = parts[-1][:-len(".git")] if parts[-1].endswith(".git") else parts[-1]
+        return f"{parts[-2]}/{name}"
+
+    def _git(self, *args, quiet=False):
+        """Runs a git command in the repository and returns its stripped stdout, or None on failure."""
+        command = ["git", "-C", self.repo_path, *args]
+        try:
+            process = subprocess.run(command, capture_output=True, text=True, check=True)
+            return process.stdout.strip()
+        except FileNotFoundError:
+            if not quiet:
+                click.echo("Error: `git` command not found.", err=True)
+            return None
+        except subprocess.CalledProcessError as e:
+            if not quiet:
+                click.echo(f"Error running git {' '.join(args)}: {e.stderr.strip()}", err=True)
+            return None
+
+    def _resolve_ref(self, *candidates):
+        """Returns the first candidate ref that exists in the repository."""
+        for ref in candidates:
+            if ref and self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}", quiet=True):
+                return ref
+        return None
+
+    def _default_base(self):
+        """Determines the PR base: GITHUB_BASE_REF in Actions, else the remote's default branch."""
+        base_ref = os.environ.get("GITHUB_BASE_REF")
+        if base_ref:
+            return self._resolve_ref(f"origin/{base_ref}", base_ref)
+        remote_head = self._git("symbolic-ref", "--short", "refs/remotes/origin/HEAD", quiet=True)
+        return self._resolve_ref(remote_head, "origin/main", "origin/master", "main", "master")
+
+    def _changed_files(self, *diff_args):
+        """Returns per-file churn from `git diff --numstat` (binary files count as zero lines)."""
+        output = self._git(*diff_args, "--numstat")
+        if output is None:
+            return None
+        files = []
+        for line in output.splitlines():
+            parts = line.split("\t", 2)
+            if len(parts) != 3:
+                continue
+            additions, deletions, filename = parts
+            files.append(ChangedFile(
+                filename,
+                None,
+                int(additions) if additions.isdigit() else 0,
+                int(deletions) if deletions.isdigit() else 0,
+            ))
+        return files
+
+    @staticmethod
+    def _event_pull_request(pr_number):
+        """Returns the pull request from the GitHub Actions event payload, if it matches `pr_number`."""
+        event_path = os.environ.get("GITHUB_EVENT_PATH")
+        if not event_path or not os.path.exists(event_path):
+            return {}
+        try:
+            with open(event_path, "r") as f:
+                pull_request = json.load(f).get("pull_request") or {}
+        except (IOError, json.JSONDecodeError):
+            return {}
+        return pull_request if pull_request.get("number") == pr_number else {}
+
+    def _pull_request_head(self, pr_number, pull_request):
+        """
+        Returns the ref holding the head of `pr_number`: the checkout itself when the
+        GitHub Actions event is for that PR, else a fetched `refs/pull/N/head`.
+        """
+        if pull_request:
+            return self._resolve_ref((pull_request.get("head") or {}).get("sha"), "HEAD")
+        return self._resolve_ref(f"refs/pull/{pr_number}/head", f"refs/remotes/origin/pull/{pr_number}/head")
+
+    def get_pull_request_context(self, pr_number, base=None):
+        """
+        Builds context for a Pull Request from the commits between its base and head.
+        The PR must be the one the GitHub Actions event is for, or have been fetched
+        as `refs/pull/N/head`. Title and description come from the event payload when
+        available, otherwise the title falls back to the subject of the first commit.
+        """
+        if not self.is_configured:
+            click.echo("Not inside a git repository. Cannot get PR context.", err=True)
+            return None
+
+        click.echo(f"Building PR context for PR #{pr_number} from local git...")
+        pull_request = self._event_pull_request(pr_number)
+        head = self._pull_request_head(pr_number, pull_request)
+        if not head:
+            click.echo(f"Error: PR #{pr_number} is not available locally. Run this in a GitHub Actions workflow "
+                       f"for that PR, or fetch it with `git fetch origin pull/{pr_number}/head:refs/pull/{pr_number}/head`.", err=True)
+            return None
+        base = self._resolve_ref(base) if base else self._default_base()
+        if not base:
+            click.echo("Error: Could not determine the PR base branch. Make sure it has been fetched.", err=True)
+            return None
+
+        log_output = self._git("log", "--no-merges", "--reverse", f"--format=%B{COMMIT_SEPARATOR}", f"{base}..{head}")
+        files = self._changed_files("diff", f"{base}...{head}")
+        if log_output is None or files is None:
+            return None
+        commit_messages = [m.strip() for m in log_output.split(COMMIT_SEPARATOR) if m.strip()]
+
+        title = pull_request.get("title") or (commit_messages[0].splitlines()[0] if commit_messages else None)
+        # Only the event payload knows the PR's branch name; a fetched pull ref has none
+        head_ref = ((pull_request.get("head") or {}).get("ref") or os.environ.get("GITHUB_HEAD_REF")) if pull_request else None
+
+        return PRContext(
+            pr_number=pr_number,
+            title=title,
+            description=pull_request.get("body"),
+            head_ref=head_ref,
+            commit_messages=commit_messages,
+            files=files,
+        )
+
+    def get_commit_context(self, commit_sha):
+        """
+        Builds context for a given Commit.
+        Returns commit message and the files it changed.
+        """
+        if not self.is_configured:
+            click.echo("Not inside a git repository. Cannot get commit context.", err=True)
+            return None
+
+        click.echo(f"Building commit context for SHA: {commit_sha} from local git...")
+        message = self._git("show", "-s", "--format=%B", commit_sha)
+        if message is None:
+            return None
+        return CommitContext(
+            commit_sha=commit_sha,
+            message=message,
+            files=self._changed_files("show", "--format=", commit_sha) or [],
+        )
+
+    def get_branch_context(self, branch_name):
+        """
+        Builds context for a given Branch from its latest commit.
+        """
+        if not self.is_configured:
+            click.echo("Not inside a git repository. Cannot get branch context.", err=True)
+            return None
+
+        click.echo(f"Building branch context for branch: {branch_name} from local git...")
+        ref = self._resolve_ref(branch_name, f"origin/{branch_name}")
+        if not ref:
+            click.echo(f"Error: Branch '{branch_name}' not found in the local repository.", err=True)
+            return None
+
+        latest_commit_sha = self._git("rev-parse", ref)
+        commit_context = self.get_commit_context(latest_commit_sha)
+
+        return BranchContext(
+            branch_name=branch_name,
+            latest_commit_sha=latest_commit_sha,
+            latest_commit_message=commit_context.message if commit_context else None,
+            files=commit_context.files if commit_context else [],
+        )
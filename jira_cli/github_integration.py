@@ -1,18 +1,83 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import click
 from .config_manager import ConfigManager
+from .models import BranchContext, ChangedFile, CommitContext, PRContext
+from .rate_limiter import get_governor, is_rate_limited
+from .transport import install_transport
 
 GITHUB_API_URL = "https://api.github.com"
+POOL_MAXSIZE = 32
+MAX_RATE_LIMIT_RETRIES = 3
+PER_PAGE = 100
+MAX_PAGES = 30 # GitHub caps PR file listings at 3000 entries
+
+
+def parse_repo_slug(slug):
+    """
+    Splits an 'owner/name' repository slug into an (owner, name) tuple.
+    Raises ValueError if the slug is malformed.
+    """
+    parts = slug.strip().strip("/").split("/") if slug else []
+    if len(parts) != 2 or not all(parts):
+        raise ValueError(f"Invalid repository '{slug}'. Expected the form 'owner/name'.")
+    return parts[0], parts[1]
+
+
+def parse_pr_reference(reference):
+    """
+    Parses a pull request reference of the form 'N' or 'owner/name#N'.
+    Returns a (repository slug or None, PR number) tuple.
+    Raises ValueError if the reference is malformed.
+    """
+    slug, _, number = str(reference).strip().rpartition("#")
+    if not number.isdigit() or int(number) == 0:
+        raise ValueError(f"Invalid pull request '{reference}'. Expected 'N' or 'owner/name#N'.")
+    if slug:
+        parse_repo_slug(slug)
+    return slug or None, int(number)
+
+
+def repo_slug_from_webhook(payload):
+    """
+    Extracts the 'owner/name' slug from a GitHub webhook or Actions event payload.
+    Returns None if the payload does not reference a repository.
+    """
+    repository = (payload or {}).get("repository") or {}
+    if repository.get("full_name"):
+        return repository["full_name"]
+    owner = (repository.get("owner") or {}).get("login")
+    name = repository.get("name")
+    return f"{owner}/{name}" if owner and name else None
+
+
+def create_session():
+    """Creates a pooled HTTP session suitable for sharing across repositories."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # Record/replay cassettes (HTTP_TRANSPORT config) replace the network adapter
+    install_transport(session)
+    return session
+
 
 class GitHubIntegration:
-    def __init__(self):
+    def __init__(self, repo=None, session=None):
         config_manager = ConfigManager()
         config = config_manager.load_config()
 
         self.github_token = config.get("GITHUB_TOKEN")
         self.owner = config.get("GITHUB_OWNER")
         self.repo = config.get("GITHUB_REPO")
+        if repo:
+            self.owner, self.repo = parse_repo_slug(repo)
+
+        # Connections are shared when provided by a GitHubRepoRegistry; the rate-limit
+        # governor is process-wide since GitHub budgets per token, not per repository.
+        self.session = session if session is not None else create_session()
+        self.governor = get_governor("github")
 
         if not all([self.github_token, self.owner, self.repo]):
             self.github_token = None # Explicitly set to None if incomplete
@@ -30,6 +95,10 @@ class GitHubIntegration:
     def is_configured(self):
         return all([self.github_token, self.owner, self.repo])
 
+    @property
+    def repo_slug(self):
+        return f"{self.owner}/{self.repo}" if self.is_configured else None
+
     def _make_request(self, method, path, params=None):
         if not self.is_configured:
             click.echo("GitHub integration is not configured. Skipping API request.", err=True)
@@ -37,17 +106,47 @@ class GitHubIntegration:
 
         url = f"{GITHUB_API_URL}/repos/{self.owner}/{self.repo}/{path}"
         try:
-            response = requests.request(method, url, headers=self.headers, params=params)
+            for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+                self.governor.acquire()
+                response = self.session.request(method, url, headers=self.headers, params=params)
+                self.governor.update_from_headers(response.headers)
+                if not is_rate_limited(response.status_code, response.headers) or attempt == MAX_RATE_LIMIT_RETRIES:
+                    break
+                wait = self.governor.penalize(response.headers.get("Retry-After"))
+                click.echo(f"GitHub rate limit hit. Retrying in {int(wait)}s...", err=True)
             response.raise_for_status()  # Raise an exception for HTTP errors
             return response.json()
         except requests.exceptions.RequestException as e:
             click.echo(f"GitHub API Error: {e}", err=True)
             return None
 
+    def _paginate(self, path, params=None):
+        """
+        Fetches every page of a list endpoint and returns the concatenated items.
+        Returns None if the first page fails.
+        """
+        items = []
+        for page in range(1, MAX_PAGES + 1):
+            page_items = self._make_request("GET", path, params={**(params or {}), "per_page": PER_PAGE, "page": page})
+            if page_items is None:
+                return items if page > 1 else None
+            items.extend(page_items)
+            if len(page_items) < PER_PAGE:
+                break
+        return items
+
+    @staticmethod
+    def _changed_files(files_data):
+        # Keep only the fields we use; the API also returns patches and URLs per file
+        return [
+            ChangedFile(f["filename"], f.get("status"), f.get("additions", 0), f.get("deletions", 0))
+            for f in files_data or []
+        ]
+
     def get_pull_request_context(self, pr_number):
         """
         Fetches context for a given Pull Request.
-        Returns PR title, description, and related commit messages.
+        Returns PR title, description, head branch, related commit messages and changed files.
         """
         if not self.is_configured:
             click.echo("GitHub integration is not configured. Cannot get PR context.", err=True)
@@ -61,24 +160,27 @@ class GitHubIntegration:
         title = pr_data.get("title")
         description = pr_data.get("body")
 
-        commits_data = self._make_request("GET", f"pulls/{pr_number}/commits")
+        commits_data = self._paginate(f"pulls/{pr_number}/commits")
         commit_messages = []
         if commits_data:
             for commit in commits_data:
                 commit_messages.append(commit["commit"]["message"])
+
+        files = self._changed_files(self._paginate(f"pulls/{pr_number}/files"))
         
-        return {
-            "type": "pull_request",
-            "pr_number": pr_number,
-            "title": title,
-            "description": description,
-            "commit_messages": commit_messages,
-        }
+        return PRContext(
+            pr_number=pr_number,
+            title=title,
+            description=description,
+            head_ref=(pr_data.get("head") or {}).get("ref"),
+            commit_messages=commit_messages,
+            files=files,
+        )
 
     def get_commit_context(self, commit_sha):
         """
         Fetches context for a given Commit.
-        Returns commit message.
+        Returns commit message and changed files.
         """
         if not self.is_configured:
             click.echo("GitHub integration is not configured. Cannot get commit context.", err=True)
@@ -89,11 +191,12 @@ class GitHubIntegration:
         if not commit_data:
             return None
         
-        return {
-            "type": "commit",
-            "commit_sha": commit_sha,
-            "message": commit_data["commit"]["message"],
-        }
+        # The commit endpoint already includes up to 300 changed files; no extra request needed
+        return CommitContext(
+            commit_sha=commit_sha,
+            message=commit_data["commit"]["message"],
+            files=self._changed_files(commit_data.get("files")),
+        )
 
     def get_branch_context(self, branch_name):
         """
@@ -113,9 +216,50 @@ class GitHubIntegration:
         # For a full context, you might want to get the commit message of the latest commit
         commit_context = self.get_commit_context(latest_commit_sha)
         
-        return {
-            "type": "branch",
-            "branch_name": branch_name,
-            "latest_commit_sha": latest_commit_sha,
-            "latest_commit_message": commit_context["message"] if commit_context else None,
-        }
+        return BranchContext(
+            branch_name=branch_name,
+            latest_commit_sha=latest_commit_sha,
+            latest_commit_message=commit_context.message if commit_context else None,
+            files=commit_context.files if commit_context else [],
+        )
+
+
+class GitHubRepoRegistry:
+    """
+    Registry of GitHubIntegration instances keyed by 'owner/name'.
+    All registered repositories share one pooled session and the process-wide GitHub
+    rate-limit governor, so batch jobs can interleave work across repositories in a single process.
+    """
+    def __init__(self, repos=None):
+        self.session = create_session()
+        self._integrations = {}
+        if repos is None:
+            repos = ConfigManager().load_config().get("GITHUB_REPOS") or []
+        for slug in repos:
+            self.get(slug)
+
+    def get(self, slug=None):
+        """
+        Returns the integration for a repository, creating it on first use.
+        Without a slug, returns the integration for the configured repository.
+        """
+        if slug:
+            owner, name = parse_repo_slug(slug)
+            slug = f"{owner}/{name}"
+        key = slug.lower() if slug else ""
+        if key not in self._integrations:
+            self._integrations[key] = GitHubIntegration(repo=slug, session=self.session)
+        return self._integrations[key]
+
+    def from_webhook(self, payload):
+        """Returns the integration for the repository referenced by a webhook payload."""
+        slug = repo_slug_from_webhook(payload)
+        if not slug:
+            raise ValueError("Webhook payload does not reference a repository.")
+        return self.get(slug)
+
+    def __iter__(self):
+        return iter(self._integrations.values())
+
+    def __len__(self):
+        return len(self._integrations)
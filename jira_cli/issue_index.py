@@ -0,0 +1,159 @@
+import os
+import json
+import hashlib
+import click
+from .config_manager import CONFIG_DIR
+
+try:
+    import numpy as np
+except ImportError: # Optional dependency: pip install jira-cli[embeddings]
+    np = None
+
+INDEX_DIR = os.path.join(CONFIG_DIR, "issue_index")
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.json"
+EMBED_TEXT_CHARS = 4000 # Description prefix used for embedding and kept in the sidecar
+
+
+def _issue_text(issue):
+    return f"{issue['summary'] or ''}\n\n{(issue.get('description') or '')[:EMBED_TEXT_CHARS]}"
+
+
+def _content_hash(issue):
+    return hashlib.sha1(_issue_text(issue).encode("utf-8")).hexdigest()
+
+
+class IssueEmbeddingIndex:
+    """
+    Local vector index of Jira issues for semantic duplicate detection.
+    Unit-normalized embeddings live in a memory-mapped NumPy array (`vectors.npy`),
+    with a JSON sidecar (`ids.json`) mapping each row to its issue key, summary,
+    description and content hash. Only issues whose summary/description changed
+    are re-embedded on sync.
+    """
+    def __init__(self, index_dir=None):
+        self.index_dir = index_dir if index_dir else INDEX_DIR
+        self.vectors_path = os.path.join(self.index_dir, VECTORS_FILE)
+        self.ids_path = os.path.join(self.index_dir, IDS_FILE)
+        self._entries = None
+        self._vectors = None
+
+    @property
+    def is_available(self):
+        return np is not None and os.path.exists(self.vectors_path) and os.path.exists(self.ids_path)
+
+    def _load(self):
+        if self._entries is None:
+            if not self.is_available:
+                return [], None
+            with open(self.ids_path, "r") as f:
+                entries = json.load(f)["issues"]
+            vectors = np.load(self.vectors_path, mmap_mode="r")
+            # The two files are replaced one after the other, so a crash in between leaves them out of step
+            if len(entries) != vectors.shape[0]:
+                click.echo("Warning: The issue index is inconsistent. Rebuild it with `jira-cli index --rebuild`.", err=True)
+                return [], None
+            self._entries, self._vectors = entries, vectors
+        return self._entries, self._vectors
+
+    def sync(self, issues, embed_fn, rebuild=False):
+        """
+        Adds or updates `issues` (dicts with key, summary, description) in the index.
+        With `rebuild`, the index is replaced by just `issues`, re-embedding all of them.
+        `embed_fn` maps a list of texts to a list of vectors, or returns None on failure.
+        Returns the number of issues that were (re-)embedded, or None on failure; the
+        existing index is left untouched on failure.
+        """
+        if np is None:
+            click.echo("Error: The embedding index requires numpy. Install with `pip install jira-cli[embeddings]`.", err=True)
+            return None
+
+        if rebuild and not issues:
+            self.clear()
+            return 0
+        entries, vectors = ([], None) if rebuild else self._load()
+        rows = {entry["key"]: i for i, entry in enumerate(entries)}
+        entries = list(entries)
+        stale = []
+        for issue in issues:
+            content_hash = _content_hash(issue)
+            row = rows.get(issue["key"])
+            if row is not None and entries[row]["hash"] == content_hash:
+                continue
+            entry = {
+                "key": issue["key"],
+                "summary": issue["summary"],
+                "description": (issue.get("description") or "")[:EMBED_TEXT_CHARS],
+                "hash": content_hash,
+            }
+            if row is None:
+                rows[issue["key"]] = row = len(entries)
+                entries.append(entry)
+            else:
+                entries[row] = entry
+            stale.append(row)
+
+        if not stale:
+            return 0
+
+        embeddings = embed_fn([_issue_text(entries[row]) for row in stale])
+        if embeddings is None:
+            return None
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.where(norms == 0, 1, norms)
+
+        if vectors is not None and vectors.shape[1] != embeddings.shape[1]:
+            click.echo("Embedding dimension changed. Rebuild the index with `jira-cli index --rebuild`.", err=True)
+            return None
+
+        # Write the new matrix next to the old one, then swap both files in
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_vectors_path = f"{self.vectors_path}.tmp.npy"
+        updated = np.lib.format.open_memmap(tmp_vectors_path, mode="w+", dtype=np.float32,
+                                            shape=(len(entries), embeddings.shape[1]))
+        if vectors is not None:
+            updated[:len(vectors)] = vectors
+        updated[stale] = embeddings
+        updated.flush()
+        del updated
+
+        tmp_ids_path = f"{self.ids_path}.tmp"
+        with open(tmp_ids_path, "w") as f:
+            json.dump({"dim": int(embeddings.shape[1]), "issues": entries}, f)
+        # Release the memory map of the old file before replacing it
+        self._entries = self._vectors = vectors = None
+        os.replace(tmp_vectors_path, self.vectors_path)
+        os.replace(tmp_ids_path, self.ids_path)
+        return len(stale)
+
+    def query(self, vector, k=5):
+        """
+        Returns up to `k` (issue, cosine similarity) pairs most similar to `vector`,
+        best first. Issues are dicts with key, summary and description.
+        Returns None if the index cannot answer the query, e.g. because it is
+        missing or was built with a different embedding model.
+        """
+        entries, vectors = self._load()
+        if vectors is None:
+            return None
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape[0] != vectors.shape[1]:
+            click.echo(f"Warning: The issue index holds {vectors.shape[1]}-dimensional embeddings but the query has "
+                       f"{query.shape[0]}. Rebuild it with `jira-cli index --rebuild`.", err=True)
+            return None
+        norm = np.linalg.norm(query)
+        if norm == 0 or not len(entries):
+            return []
+        scores = vectors @ (query / norm)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(entries[i], float(scores[i])) for i in top]
+
+    def clear(self):
+        """Removes the index files."""
+        for path in (self.vectors_path, self.ids_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._entries = self._vectors = None
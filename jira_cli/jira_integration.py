@@ -2,7 +2,14 @@ import os
 from jira import JIRA
 import click
 from .config_manager import ConfigManager
+from .models import IssueSummary
+from .rate_limiter import get_governor, govern_session
+from .transport import install_transport
 #test for push
+
+# Only these fields are requested from Jira; see IssueSummary
+ISSUE_SUMMARY_FIELDS = "summary,description,status"
+
 class JiraIntegration:
     def __init__(self):
         config_manager = ConfigManager()
@@ -11,6 +18,7 @@ class JiraIntegration:
         self.jira_server = config.get("JIRA_SERVER")
         self.jira_username = config.get("JIRA_USERNAME")
         self.jira_api_token = config.get("JIRA_API_TOKEN")
+        self.governor = get_governor("jira")
 
         if not all([self.jira_server, self.jira_username, self.jira_api_token]):
             click.echo("Error: Jira configuration not found. Please run 'jira-ai config' to set up your credentials.", err=True)
@@ -18,15 +26,44 @@ class JiraIntegration:
             return
 
         try:
+            # The server info request that the constructor normally makes is deferred until
+            # the record/replay transport and the rate-limit governor are mounted.
             self.jira = JIRA(
                 server=self.jira_server,
-                basic_auth=(self.jira_username, self.jira_api_token)
+                basic_auth=(self.jira_username, self.jira_api_token),
+                get_server_info=False
             )
+            install_transport(self.jira._session)
+            # Tokens are taken per HTTP request, so paginated searches and the client's
+            # own retries count against the budget too
+            govern_session(self.jira._session, self.governor)
+            # Restore what the constructor would have read; deploymentType selects the
+            # Cloud search API, so cassettes must see the same requests as production
+            server_info = self.jira.server_info()
+            self.jira._version = tuple(server_info["versionNumbers"])
+            self.jira.deploymentType = server_info.get("deploymentType")
+            # Feed every response's rate-limit headers back to the governor
+            self.jira._session.hooks["response"].append(self._on_response)
             click.echo("Successfully connected to Jira.", err=False) # Log success for debugging
         except Exception as e:
             click.echo(f"Error connecting to Jira: {e}", err=True)
             self.jira = None
     
+    def _on_response(self, response, *args, **kwargs):
+        self.governor.update_from_headers(response.headers)
+        if response.status_code == 429:
+            self.governor.penalize(response.headers.get("Retry-After"))
+
+    def _report_error(self, message, error):
+        """
+        Reports a failed Jira call, calling out rate limiting explicitly
+        instead of surfacing it as a generic error.
+        """
+        if getattr(error, "status_code", None) == 429:
+            click.echo(f"{message}: Jira rate limit exceeded. Try again later or lower RATE_LIMITS['jira'].", err=True)
+        else:
+            click.echo(f"{message}: {error}", err=True)
+
     def get_issue_status(self, issue_key: str) -> str:
         """
         Retrieves the status of a Jira issue.
@@ -37,24 +74,55 @@ class JiraIntegration:
             issue = self.jira.issue(issue_key)
             return issue.fields.status.name
         except Exception as e:
-            click.echo(f"Error getting status for issue {issue_key}: {e}", err=True)
+            self._report_error(f"Error getting status for issue {issue_key}", e)
             return ""
 
     def search_issues(self, jql_query, max_results=5):
         """
-        Searches Jira issues using a JQL query.
-        Returns a list of issue objects.
+        Searches Jira issues using a JQL query, fetching only the fields the CLI uses.
+        `max_results=False` fetches all matches.
+        Returns a list of IssueSummary objects.
         """
         if not self.jira:
             return [] # Return empty list if Jira is not initialized
         click.echo(f"Searching Jira with JQL: {jql_query}", err=False)
         try:
-            issues = self.jira.search_issues(jql_query, maxResults=max_results)
-            return issues
+            issues = self.jira.search_issues(jql_query, maxResults=max_results, fields=ISSUE_SUMMARY_FIELDS)
+            return [IssueSummary.from_jira(issue) for issue in issues]
         except Exception as e:
-            click.echo(f"Error searching Jira issues: {e}", err=True)
+            self._report_error("Error searching Jira issues", e)
             return [] # Return empty list on error
 
+    def get_issues_by_keys(self, issue_keys):
+        """
+        Fetches several issues by key in a single JQL search.
+        Keys that do not exist are ignored rather than failing the whole query.
+        Returns a list of IssueSummary objects.
+        """
+        if not self.jira or not issue_keys:
+            return []
+        jql_query = f"key in ({', '.join(issue_keys)})"
+        click.echo(f"Fetching referenced Jira issues: {', '.join(issue_keys)}", err=False)
+        try:
+            issues = self.jira.search_issues(jql_query, maxResults=len(issue_keys), validate_query=False,
+                                             fields=ISSUE_SUMMARY_FIELDS)
+            return [IssueSummary.from_jira(issue) for issue in issues]
+        except Exception as e:
+            self._report_error("Error fetching referenced Jira issues", e)
+            return []
+
+    def get_project_keys(self):
+        """
+        Returns the keys of all projects visible to the configured user.
+        """
+        if not self.jira:
+            return []
+        try:
+            return [project.key for project in self.jira.projects()]
+        except Exception as e:
+            self._report_error("Error listing Jira projects", e)
+            return []
+
     def create_issue(self, project, summary, description, issue_type="Task", labels=None):
         """
         Creates a new Jira issue.
@@ -75,7 +143,7 @@ class JiraIntegration:
             new_issue = self.jira.create_issue(fields=issue_dict)
             return new_issue
         except Exception as e:
-            click.echo(f"Error creating Jira issue: {e}", err=True)
+            self._report_error("Error creating Jira issue", e)
             return None
 
     def transition_issue(self, issue_key, transition_name):
@@ -102,7 +170,19 @@ class JiraIntegration:
                 click.echo(f"Error: Transition '{transition_name}' not found for issue {issue_key}.", err=True)
                 return False
         except Exception as e:
-            click.echo(f"Error transitioning Jira issue {issue_key}: {e}", err=True)
+            self._report_error(f"Error transitioning Jira issue {issue_key}", e)
+            return False
+
+    def has_comment(self, issue_key, comment_body):
+        """
+        Checks whether an issue already has a comment with exactly this body.
+        """
+        if not self.jira:
+            return False
+        try:
+            return any(comment.body == comment_body for comment in self.jira.comments(issue_key))
+        except Exception as e:
+            self._report_error(f"Error reading comments of Jira issue {issue_key}", e)
             return False
 
     def add_comment(self, issue_key, comment_body):
@@ -117,5 +197,5 @@ class JiraIntegration:
             new_comment = self.jira.add_comment(issue_key, comment_body)
             return new_comment
         except Exception as e:
-            click.echo(f"Error adding comment to Jira issue {issue_key}: {e}", err=True)
+            self._report_error(f"Error adding comment to Jira issue {issue_key}", e)
             return None
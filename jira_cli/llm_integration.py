@@ -3,7 +3,19 @@ import json
 import click
 import os
 import litellm
+from typing import Dict, List, Optional
 from .config_manager import ConfigManager
+from .models import Action, dumps
+from .rate_limiter import get_governor
+
+CHARS_PER_TOKEN = 4 # Rough estimate used to pack batched prompts
+DEFAULT_BATCH_TOKEN_BUDGET = 6000
+BATCH_INSTRUCTIONS = (
+    "The 'items' list holds independent contexts, each with an 'id'. Answer each one separately "
+    "and respond with a JSON object of the form {\"results\": [{\"id\": <item id>, \"actions\": [...]}]}, "
+    "using the same action format as for a single context."
+)
+EMBEDDING_BATCH_SIZE = 64
 
 class LLMIntegration:
     def __init__(self):
@@ -13,6 +25,12 @@ class LLMIntegration:
         self.model = self.config.get("LLM_MODEL")
         self.api_key = self.config.get("LLM_API_KEY")
         self.custom_command = self.config.get("LLM_CUSTOM_COMMAND")
+        self.governor = get_governor("llm")
+        self.batch_token_budget = int(self.config.get("LLM_BATCH_TOKEN_BUDGET", DEFAULT_BATCH_TOKEN_BUDGET))
+        # Optional embedding pipeline: 'litellm' (API models) or 'sentence-transformers' (local models)
+        self.embedding_provider = self.config.get("LLM_EMBEDDING_PROVIDER", "litellm").lower()
+        self.embedding_model = self.config.get("LLM_EMBEDDING_MODEL")
+        self._local_embedder = None
 
         # Set API key for litellm if applicable
         if self.api_key:
@@ -27,6 +45,161 @@ class LLMIntegration:
         """
         Generic entry point to call the configured LLM provider.
         """
+        output = self._complete(prompt)
+        if output is None:
+            return {"actions": []}
+        return self._parse_and_validate(output)
+
+    @property
+    def has_embeddings(self):
+        return bool(self.embedding_model)
+
+    def embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """
+        Embeds texts with the configured embedding model, in batches of EMBEDDING_BATCH_SIZE.
+        Returns one vector per text, or None if embeddings are not configured or a call failed.
+        """
+        if not self.has_embeddings:
+            return None
+        vectors = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            batch = texts[start:start + EMBEDDING_BATCH_SIZE]
+            if self.embedding_provider == "sentence-transformers":
+                batch_vectors = self._embed_local(batch)
+            elif self.embedding_provider == "litellm":
+                batch_vectors = self._embed_litellm(batch)
+            else:
+                click.echo(f"Error: Unsupported embedding provider '{self.embedding_provider}'", err=True)
+                return None
+            if batch_vectors is None:
+                return None
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def _embed_litellm(self, texts: List[str]) -> Optional[List[List[float]]]:
+        self.governor.acquire()
+        try:
+            response = litellm.embedding(model=self.embedding_model, input=texts)
+            self.governor.update_from_headers(self._response_headers(response))
+            return [item["embedding"] if isinstance(item, dict) else item.embedding for item in response.data]
+        except litellm.RateLimitError as e:
+            wait = self.governor.penalize(self._response_headers(getattr(e, "response", None)).get("retry-after"))
+            click.echo(f"Embedding rate limit exceeded. Further LLM calls paused for {int(wait)}s.", err=True)
+            return None
+        except Exception as e:
+            click.echo(f"Error computing embeddings via litellm: {e}", err=True)
+            return None
+
+    def _embed_local(self, texts: List[str]) -> Optional[List[List[float]]]:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            click.echo("Error: Local embeddings require the 'sentence-transformers' package. Install with `pip install jira-cli[local-embeddings]`.", err=True)
+            return None
+        try:
+            if self._local_embedder is None:
+                self._local_embedder = SentenceTransformer(self.embedding_model)
+            return self._local_embedder.encode(texts, batch_size=EMBEDDING_BATCH_SIZE).tolist()
+        except Exception as e:
+            click.echo(f"Error computing embeddings with sentence-transformers: {e}", err=True)
+            return None
+
+    def call_llm_batch(self, items: Dict[str, dict], instructions: str) -> Dict[str, dict]:
+        """
+        Answers several independent prompts with as few LLM calls as possible.
+        `items` maps an item ID to its prompt data; items are packed into prompts of up to
+        `batch_token_budget` estimated tokens sharing a single copy of `instructions`.
+        If no item of a batch validates, the batch is split in half and retried; items
+        missing from an otherwise valid answer are retried together once, then one by one.
+        A failed call (provider error, rate limit) is not retried and yields no actions
+        for its items. Returns a dict mapping every item ID to its output.
+        """
+        results = {}
+        for batch in self._pack_batches(items, instructions):
+            self._run_batch(batch, items, instructions, results)
+        return results
+
+    def _pack_batches(self, items: Dict[str, dict], instructions: str) -> List[List[str]]:
+        overhead = (len(instructions) + len(BATCH_INSTRUCTIONS)) // CHARS_PER_TOKEN
+        batches, current, used = [], [], overhead
+        for item_id, data in items.items():
+            size = len(dumps(data)) // CHARS_PER_TOKEN
+            if current and used + size > self.batch_token_budget:
+                batches.append(current)
+                current, used = [], overhead
+            current.append(item_id)
+            used += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run_batch(self, batch: List[str], items: Dict[str, dict], instructions: str, results: Dict[str, dict],
+                   retry_missing: bool = True):
+        if len(batch) == 1:
+            item_id = batch[0]
+            results[item_id] = self.call_llm(dumps({**items[item_id], "request": instructions}))
+            return
+
+        click.echo(f"Batching {len(batch)} items into one LLM call...", err=False)
+        prompt = dumps({
+            "request": f"{instructions} {BATCH_INSTRUCTIONS}",
+            "items": [{"id": item_id, **items[item_id]} for item_id in batch],
+        })
+        output = self._complete(prompt)
+        if output is None:
+            # Smaller batches would fail the same way and only multiply the calls
+            results.update({item_id: {"actions": []} for item_id in batch})
+            return
+        parsed = self._parse_batch(output, batch)
+        results.update(parsed)
+
+        failed = [item_id for item_id in batch if item_id not in parsed]
+        if not failed:
+            return
+        if len(failed) == len(batch):
+            middle = len(failed) // 2
+            self._run_batch(failed[:middle], items, instructions, results, retry_missing)
+            self._run_batch(failed[middle:], items, instructions, results, retry_missing)
+        elif retry_missing:
+            self._run_batch(failed, items, instructions, results, retry_missing=False)
+        else:
+            for item_id in failed:
+                self._run_batch([item_id], items, instructions, results)
+
+    def _parse_batch(self, output: str, batch: List[str]) -> Dict[str, dict]:
+        """
+        Demultiplexes a batched response into per-item outputs.
+        Only items whose `actions` pass `_validate_output` are returned.
+        """
+        try:
+            parsed_output = self._parse_json(output)
+            entries = parsed_output.get("results") if isinstance(parsed_output, dict) else None
+            if not isinstance(entries, list):
+                raise ValueError("Batched output must be a dictionary with a 'results' list.")
+        except (json.JSONDecodeError, ValueError) as e:
+            click.echo(f"Error parsing batched LLM output: {e}", err=True)
+            return {}
+
+        results = {}
+        for entry in entries:
+            item_id = str(entry.get("id")) if isinstance(entry, dict) else None
+            if item_id not in batch or item_id in results:
+                continue
+            item_output = {"actions": entry.get("actions")}
+            try:
+                self._validate_output(item_output)
+            except ValueError as e:
+                click.echo(f"Validation error for batched item {item_id}: {e}", err=True)
+                continue
+            results[item_id] = item_output
+        return results
+
+    def _complete(self, prompt: str) -> Optional[str]:
+        """
+        Sends a prompt to the configured provider and returns its raw text output,
+        or None if the call failed.
+        """
+        self.governor.acquire()
         if self.provider == 'gemini-cli':
             return self._call_gemini_cli(prompt)
         elif self.provider == 'custom-cli':
@@ -35,9 +208,9 @@ class LLMIntegration:
             return self._call_litellm(prompt)
         else:
             click.echo(f"Error: Unsupported LLM provider '{self.provider}'", err=True)
-            return {"actions": []}
+            return None
 
-    def _call_litellm(self, prompt: str) -> dict:
+    def _call_litellm(self, prompt: str) -> Optional[str]:
         """
         Calls an LLM via the litellm library.
         """
@@ -58,28 +231,45 @@ class LLMIntegration:
                 messages=[{"role": "user", "content": prompt}],
                 response_format={"type": "json_object"} if self.provider == 'openai' else None
             )
+            self.governor.update_from_headers(self._response_headers(response))
             
-            content = response.choices[0].message.content.strip()
-            return self._parse_and_validate(content)
+            return response.choices[0].message.content.strip()
 
+        except litellm.RateLimitError as e:
+            wait = self.governor.penalize(self._response_headers(getattr(e, "response", None)).get("retry-after"))
+            click.echo(f"LLM rate limit exceeded. Further LLM calls paused for {int(wait)}s.", err=True)
+            return None
         except Exception as e:
             click.echo(f"Error calling LLM via litellm: {e}", err=True)
-            return {"actions": []}
+            return None
+
+    @staticmethod
+    def _response_headers(response) -> dict:
+        """
+        Returns the provider's HTTP response headers from a litellm response or error response.
+        litellm exposes them under `_hidden_params['additional_headers']` with an
+        'llm_provider-' prefix, or directly as `headers` on raw HTTP responses.
+        """
+        headers = getattr(response, "headers", None)
+        if headers is None:
+            hidden = getattr(response, "_hidden_params", None) or {}
+            headers = hidden.get("additional_headers") or getattr(response, "_response_headers", None) or {}
+        return {str(k).lower().replace("llm_provider-", "", 1): v for k, v in dict(headers).items()}
 
-    def _call_gemini_cli(self, prompt: str) -> dict:
+    def _call_gemini_cli(self, prompt: str) -> Optional[str]:
         """
         Calls the Gemini CLI with a given prompt.
         """
         command = ["gemini", "pro", "-o", "json", prompt]
         return self._run_command(command, "Gemini CLI")
 
-    def _call_custom_cli(self, prompt: str) -> dict:
+    def _call_custom_cli(self, prompt: str) -> Optional[str]:
         """
         Calls a user-defined custom CLI command.
         """
         if not self.custom_command:
             click.echo("Error: Custom CLI command not configured.", err=True)
-            return {"actions": []}
+            return None
         
         # Replace {prompt} placeholder or append if not present
         if "{prompt}" in self.custom_command:
@@ -99,10 +289,10 @@ class LLMIntegration:
                 text=True,
                 check=True
             )
-            return self._parse_and_validate(process.stdout.strip())
+            return process.stdout.strip()
         except Exception as e:
             click.echo(f"Error calling Custom CLI: {e}", err=True)
-            return {"actions": []}
+            return None
 
     def _run_command(self, command, name):
         click.echo(f"Calling {name} with command: {' '.join(command)}", err=False)
@@ -113,25 +303,28 @@ class LLMIntegration:
                 text=True,
                 check=True
             )
-            return self._parse_and_validate(process.stdout.strip())
+            return process.stdout.strip()
         except FileNotFoundError:
             click.echo(f"Error: `{command[0]}` command not found.", err=True)
-            return {"actions": []}
+            return None
         except subprocess.CalledProcessError as e:
             click.echo(f"Error calling {name}: {e}\nStdout: {e.stdout}\nStderr: {e.stderr}", err=True)
-            return {"actions": []}
+            return None
+
+    @staticmethod
+    def _parse_json(output: str):
+        # Handle potential markdown wrapping
+        if output.startswith("```json") and output.endswith("```"):
+            json_string = output[7:-3].strip()
+        elif output.startswith("```") and output.endswith("```"):
+            json_string = output[3:-3].strip()
+        else:
+            json_string = output
+        return json.loads(json_string)
 
     def _parse_and_validate(self, output: str) -> dict:
         try:
-            # Handle potential markdown wrapping
-            if output.startswith("```json") and output.endswith("```"):
-                json_string = output[7:-3].strip()
-            elif output.startswith("```") and output.endswith("```"):
-                json_string = output[3:-3].strip()
-            else:
-                json_string = output
-
-            parsed_output = json.loads(json_string)
+            parsed_output = self._parse_json(output)
             self._validate_output(parsed_output)
             return parsed_output
         except json.JSONDecodeError as e:
@@ -142,12 +335,13 @@ class LLMIntegration:
             return {"actions": []}
 
     def _validate_output(self, output: dict):
+        """
+        Validates the output structure and converts its actions into Action objects in place.
+        """
         if not isinstance(output, dict) or "actions" not in output:
             raise ValueError("Output must be a dictionary with an 'actions' key.")
         
         if not isinstance(output["actions"], list):
             raise ValueError("The 'actions' key must be a list.")
         
-        for action in output["actions"]:
-            if not isinstance(action, dict) or "type" not in action:
-                raise ValueError("Each action must be a dictionary with a 'type' key.")
+        output["actions"] = [Action.from_dict(action) for action in output["actions"]]
@@ -0,0 +1,209 @@
+import json
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, List, Optional
+
+# Domain objects passed through the suggest/execute pipeline. They declare __slots__
+# explicitly (dataclass(slots=True) needs Python 3.10) and therefore take no field
+# defaults; use the from_*/create constructors where fields are optional.
+
+
+@dataclass
+class ChangedFile:
+    __slots__ = ("filename", "status", "additions", "deletions")
+    filename: str
+    status: Optional[str]
+    additions: int
+    deletions: int
+
+
+def _diffstat(files):
+    return {
+        "files_changed": len(files),
+        "additions": sum(f.additions for f in files),
+        "deletions": sum(f.deletions for f in files),
+    }
+
+
+@dataclass
+class PRContext:
+    __slots__ = ("pr_number", "title", "description", "head_ref", "commit_messages", "files")
+    type: ClassVar[str] = "pull_request"
+    pr_number: int
+    title: Optional[str]
+    description: Optional[str]
+    head_ref: Optional[str]
+    commit_messages: List[str]
+    files: List[ChangedFile]
+
+    @property
+    def search_text(self):
+        return self.title
+
+    @property
+    def diffstat(self):
+        return _diffstat(self.files)
+
+    def texts(self):
+        """Free-text fields, in priority order, for Jira key extraction."""
+        return [self.head_ref, self.title, self.description, *self.commit_messages]
+
+    def reference_texts(self):
+        """The fields whose Jira keys mark a ticket as worked on: the branch name and commit messages."""
+        return [self.head_ref, *self.commit_messages]
+
+
+@dataclass
+class CommitContext:
+    __slots__ = ("commit_sha", "message", "files")
+    type: ClassVar[str] = "commit"
+    commit_sha: str
+    message: str
+    files: List[ChangedFile]
+
+    @property
+    def search_text(self):
+        return self.message
+
+    @property
+    def diffstat(self):
+        return _diffstat(self.files)
+
+    def texts(self):
+        return [self.message]
+
+    def reference_texts(self):
+        return self.texts()
+
+
+@dataclass
+class BranchContext:
+    __slots__ = ("branch_name", "latest_commit_sha", "latest_commit_message", "files")
+    type: ClassVar[str] = "branch"
+    branch_name: str
+    latest_commit_sha: str
+    latest_commit_message: Optional[str]
+    files: List[ChangedFile]
+
+    @property
+    def search_text(self):
+        return self.latest_commit_message
+
+    @property
+    def diffstat(self):
+        return _diffstat(self.files)
+
+    def texts(self):
+        return [self.branch_name, self.latest_commit_message]
+
+    def reference_texts(self):
+        return self.texts()
+
+
+@dataclass
+class IssueSummary:
+    """The subset of a Jira issue the pipeline needs, instead of the full resource object."""
+    __slots__ = ("key", "summary", "description", "status", "similarity")
+    key: str
+    summary: Optional[str]
+    description: Optional[str]
+    status: Optional[str]
+    similarity: Optional[float]
+
+    @classmethod
+    def from_jira(cls, issue):
+        fields = issue.fields
+        status = getattr(fields, "status", None)
+        return cls(issue.key, getattr(fields, "summary", None), getattr(fields, "description", None),
+                   status.name if status else None, None)
+
+
+_ACTION_STRING_FIELDS = ("issue_key", "project", "summary", "description", "issue_type",
+                         "transition_name", "comment_body", "origin")
+
+
+@dataclass
+class Action:
+    """
+    A proposed Jira action. Known fields are slots; any other keys the LLM (or a user
+    edit) supplies are kept in `extra` so serialization round-trips losslessly.
+    `origin` identifies the change the action was suggested for (e.g. 'owner/name#12'),
+    and `ordinal` numbers actions of that change with the same type and target (unset for the first).
+    """
+    __slots__ = ("type", "issue_key", "project", "summary", "description", "issue_type", "labels",
+                 "transition_name", "comment_body", "similarity", "origin", "ordinal", "extra")
+    type: str
+    issue_key: Optional[str]
+    project: Optional[str]
+    summary: Optional[str]
+    description: Optional[str]
+    issue_type: Optional[str]
+    labels: Optional[List[str]]
+    transition_name: Optional[str]
+    comment_body: Optional[str]
+    similarity: Optional[float]
+    origin: Optional[str]
+    ordinal: Optional[int]
+    extra: Dict[str, Any]
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds an Action from its dict form.
+        Raises ValueError if `data` is not a dict with a string 'type', or if a
+        known field has the wrong type.
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("type"), str):
+            raise ValueError("Each action must be a dictionary with a 'type' key.")
+        for name in _ACTION_STRING_FIELDS:
+            if not isinstance(data.get(name), (str, type(None))):
+                raise ValueError(f"Action field '{name}' must be a string.")
+        labels = data.get("labels")
+        if labels is not None and not (isinstance(labels, list) and all(isinstance(label, str) for label in labels)):
+            raise ValueError("Action field 'labels' must be a list of strings.")
+        ordinal = data.get("ordinal")
+        if ordinal is not None and (isinstance(ordinal, bool) or not isinstance(ordinal, int)):
+            raise ValueError("Action field 'ordinal' must be an integer.")
+        similarity = data.get("similarity")
+        if similarity is not None and (isinstance(similarity, bool) or not isinstance(similarity, (int, float))):
+            raise ValueError("Action field 'similarity' must be a number.")
+        known = cls.__slots__[:-1]
+        return cls(*(data.get(name) for name in known),
+                   {k: v for k, v in data.items() if k not in known})
+
+    @classmethod
+    def create(cls, type, **fields):
+        return cls.from_dict({"type": type, **fields})
+
+
+_MODEL_TYPES = (ChangedFile, PRContext, CommitContext, BranchContext, IssueSummary, Action)
+
+
+def serialize(obj, exclude=()):
+    """
+    Converts models (recursively) into plain JSON-compatible data.
+    Unset (None) fields and top-level fields named in `exclude` are omitted; contexts
+    include their `type`; an Action's `extra` keys are merged back into the top level.
+    """
+    if isinstance(obj, _MODEL_TYPES):
+        data = {"type": obj.type} if isinstance(obj, (PRContext, CommitContext, BranchContext)) else {}
+        for name in obj.__slots__:
+            if name in exclude:
+                continue
+            value = getattr(obj, name)
+            if name == "extra":
+                data.update(serialize(value))
+            elif value is not None:
+                data[name] = serialize(value)
+        return data
+    if isinstance(obj, dict):
+        return {k: serialize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [serialize(v) for v in obj]
+    return obj
+
+
+def dumps(obj, **kwargs):
+    """Serializes models to JSON; compact unless `indent` is given."""
+    if "indent" not in kwargs:
+        kwargs["separators"] = (",", ":")
+    return json.dumps(serialize(obj), **kwargs)
@@ -41,6 +41,12 @@ class PolicyEngine:
     def get_lookback_days(self):
         return self.policy.get("similarity", {}).get("lookback_days", 60) # Default from PRD
 
+    def get_jira_projects(self):
+        return self.policy.get("jira_projects", [])
+
+    def get_components(self):
+        return self.policy.get("components", {})
+
     def is_action_allowed(self, action_type):
         return action_type in self.get_allowed_actions()
 
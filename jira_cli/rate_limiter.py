@@ -0,0 +1,296 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import click
+from requests.adapters import BaseAdapter
+from .config_manager import ConfigManager
+
+# Requests per second and burst size for each backend. These are starting points;
+# governors adapt from the rate-limit headers the services return.
+DEFAULT_LIMITS = {
+    "github": {"rate": 5000 / 3600, "burst": 100},
+    "jira": {"rate": 10.0, "burst": 20},
+    "llm": {"rate": 1.0, "burst": 5},
+}
+MIN_RATE = 0.01
+MAX_BACKOFF = 300.0
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def _parse_duration(value):
+    """
+    Parses a reset/retry value into seconds from now.
+    Accepts plain seconds, Go-style durations ('6m0s', '250ms'), epoch timestamps,
+    ISO 8601 timestamps and HTTP dates.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        number = float(value)
+        # Large values are epoch timestamps (GitHub's X-RateLimit-Reset)
+        return max(0.0, number - time.time()) if number > 1e9 else max(0.0, number)
+    except ValueError:
+        pass
+
+    total, num, matched = 0.0, "", False
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    i = 0
+    while i < len(value):
+        ch = value[i]
+        if ch.isdigit() or ch == ".":
+            num += ch
+            i += 1
+            continue
+        unit = "ms" if value[i:i + 2] == "ms" else ch
+        if not num or unit not in units:
+            matched = False
+            break
+        total += float(num) * units[unit]
+        num, matched = "", True
+        i += len(unit)
+    if matched and not num:
+        return total
+
+    for parse in (lambda v: datetime.fromisoformat(v.replace("Z", "+00:00")), parsedate_to_datetime):
+        try:
+            return max(0.0, parse(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _header(headers, *names):
+    """Case-insensitive lookup of the first present header among `names`."""
+    if not headers:
+        return None
+    lowered = {str(k).lower(): v for k, v in dict(headers).items()}
+    for name in names:
+        if name.lower() in lowered:
+            return lowered[name.lower()]
+    return None
+
+
+def is_rate_limited(status_code, headers=None):
+    """Returns True if a response indicates the caller has been rate limited."""
+    if status_code == 429:
+        return True
+    return status_code == 403 and str(_header(headers, "X-RateLimit-Remaining")) == "0"
+
+
+class _MemoryStore:
+    """Keeps bucket state in process memory."""
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def transact(self, name, fn):
+        with self._lock:
+            state, result = fn(self._state.get(name))
+            self._state[name] = state
+            return result
+
+
+class SqliteStore:
+    """
+    Keeps bucket state in a SQLite database so that several processes on the same
+    machine draw from one budget. Each update runs in an IMMEDIATE transaction,
+    which SQLite serializes across processes.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, state TEXT NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def transact(self, name, fn):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT state FROM buckets WHERE name = ?", (name,)).fetchone()
+            state, result = fn(json.loads(row[0]) if row else None)
+            conn.execute("INSERT OR REPLACE INTO buckets (name, state) VALUES (?, ?)", (name, json.dumps(state)))
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class RateLimitGovernor:
+    """
+    Token-bucket governor for a single backend.
+    Callers `acquire()` before each request and report responses back through
+    `update_from_headers()` / `penalize()`, which adapt the refill rate to the
+    budget the service reports and pause all callers after a 429.
+    """
+    def __init__(self, backend, rate, burst, store=None):
+        self.backend = backend
+        self.default_rate = float(rate)
+        self.burst = float(burst)
+        self.store = store if store is not None else _MemoryStore()
+
+    def _transact(self, fn):
+        try:
+            return self.store.transact(self.backend, fn)
+        except sqlite3.Error as e:
+            # e.g. "database is locked" after the busy timeout; keep limiting within this process
+            click.echo(f"Error using the shared rate-limit database: {e}. Using in-process limits.", err=True)
+            self.store = _MemoryStore()
+            return self.store.transact(self.backend, fn)
+
+    def _load(self, state, now):
+        if state is None:
+            state = {"tokens": self.burst, "updated": now, "rate": self.default_rate,
+                     "blocked_until": 0.0, "backoff": 0.0}
+        elapsed = max(0.0, now - state["updated"])
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * state["rate"])
+        state["updated"] = now
+        return state
+
+    def acquire(self, cost=1):
+        """
+        Blocks until `cost` tokens are available, then consumes them.
+        Costs above the burst size are capped at it, since the bucket never holds more.
+        """
+        cost = min(cost, self.burst)
+        while True:
+            def take(state):
+                now = time.time()
+                state = self._load(state, now)
+                if state["blocked_until"] > now:
+                    return state, state["blocked_until"] - now
+                if state["tokens"] >= cost:
+                    state["tokens"] -= cost
+                    return state, 0.0
+                return state, (cost - state["tokens"]) / state["rate"]
+
+            wait = self._transact(take)
+            if wait <= 0:
+                return
+            if wait > 5:
+                click.echo(f"Rate limit ({self.backend}): waiting {int(wait)}s...", err=True)
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """
+        Adapts the bucket from rate-limit headers.
+        Understands GitHub/Jira `X-RateLimit-*`, `Retry-After`, and the request/token
+        headers sent by OpenAI- and Anthropic-style LLM APIs.
+        """
+        retry_after = _parse_duration(_header(headers, "Retry-After"))
+        remaining = _header(headers, "X-RateLimit-Remaining", "x-ratelimit-remaining-requests",
+                            "anthropic-ratelimit-requests-remaining")
+        reset = _parse_duration(_header(headers, "X-RateLimit-Reset", "x-ratelimit-reset-requests",
+                                         "anthropic-ratelimit-requests-reset"))
+        tokens_remaining = _header(headers, "x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining")
+        tokens_reset = _parse_duration(_header(headers, "x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset"))
+
+        try:
+            remaining = int(float(remaining)) if remaining is not None else None
+            tokens_remaining = int(float(tokens_remaining)) if tokens_remaining is not None else None
+        except ValueError:
+            return
+
+        if retry_after is None and remaining is None and tokens_remaining is None:
+            return
+
+        def adapt(state):
+            now = time.time()
+            state = self._load(state, now)
+            if retry_after is not None:
+                state["blocked_until"] = max(state["blocked_until"], now + retry_after)
+            if remaining is not None:
+                state["tokens"] = min(state["tokens"], float(remaining))
+                if remaining <= 0 and reset:
+                    state["blocked_until"] = max(state["blocked_until"], now + reset)
+                elif reset:
+                    # Spread what is left of the window evenly over the time until it resets
+                    state["rate"] = max(MIN_RATE, remaining / reset)
+                state["backoff"] = 0.0
+            if tokens_remaining is not None and tokens_remaining <= 0 and tokens_reset:
+                state["blocked_until"] = max(state["blocked_until"], now + tokens_reset)
+            return state, None
+
+        self._transact(adapt)
+
+    def penalize(self, retry_after=None):
+        """
+        Pauses all callers after a rate-limit response.
+        Without a server-provided delay, backs off exponentially up to MAX_BACKOFF.
+        Returns the number of seconds callers will be paused for.
+        """
+        delay = _parse_duration(retry_after)
+
+        def backoff(state):
+            now = time.time()
+            state = self._load(state, now)
+            wait = delay if delay is not None else min(MAX_BACKOFF, max(1.0, state["backoff"] * 2))
+            state["backoff"] = wait
+            state["tokens"] = 0.0
+            state["blocked_until"] = max(state["blocked_until"], now + wait)
+            return state, state["blocked_until"] - now
+
+        return self._transact(backoff)
+
+
+class GovernedAdapter(BaseAdapter):
+    """
+    Wraps a requests transport adapter so that every HTTP request takes a governor
+    token, including the pagination and retries client libraries do internally.
+    """
+    def __init__(self, adapter, governor):
+        super().__init__()
+        self.adapter = adapter
+        self.governor = governor
+
+    def send(self, request, **kwargs):
+        self.governor.acquire()
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+
+def govern_session(session, governor):
+    """Routes all of a requests session's traffic through `governor`."""
+    for prefix in ("https://", "http://"):
+        session.mount(prefix, GovernedAdapter(session.get_adapter(prefix), governor))
+
+
+def get_governor(backend):
+    """
+    Returns the process-wide governor for a backend ('github', 'jira' or 'llm').
+    Limits can be overridden with RATE_LIMITS in the config file, e.g.
+    {"jira": {"rate": 5, "burst": 10}}. Setting RATE_LIMIT_DB to a file path
+    coordinates the budget across processes through SQLite.
+    """
+    with _governors_lock:
+        if backend not in _governors:
+            config = ConfigManager().load_config()
+            defaults = DEFAULT_LIMITS.get(backend, {"rate": 1.0, "burst": 1})
+            limits = {**defaults, **((config.get("RATE_LIMITS") or {}).get(backend) or {})}
+            if not all(isinstance(limits[name], (int, float)) and limits[name] > 0 for name in ("rate", "burst")):
+                click.echo(f"Error: RATE_LIMITS['{backend}'] needs a positive rate and burst. Using the defaults.", err=True)
+                limits = defaults
+            store = None
+            if config.get("RATE_LIMIT_DB"):
+                try:
+                    store = SqliteStore(config["RATE_LIMIT_DB"])
+                except sqlite3.Error as e:
+                    click.echo(f"Error opening rate-limit database {config['RATE_LIMIT_DB']}: {e}. Using in-process limits.", err=True)
+            _governors[backend] = RateLimitGovernor(backend, limits["rate"], limits["burst"], store)
+        return _governors[backend]
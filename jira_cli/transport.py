@@ -0,0 +1,244 @@
+import io
+import gzip
+import json
+import time
+import base64
+import random
+import hashlib
+import threading
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import click
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from .config_manager import ConfigManager
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+# Only these response headers are kept in cassettes; everything else is noise for replay
+RECORDED_HEADERS = ("content-type", "link", "retry-after")
+RECORDED_HEADER_PREFIXES = ("x-ratelimit-",)
+
+_adapters = {}
+_adapters_lock = threading.Lock()
+
+
+def request_key(method, url, body=None):
+    """
+    Identifies a request independently of query parameter order.
+    Bodies are reduced to a hash so cassettes stay small.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    normalized = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ""))
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    body_hash = hashlib.sha1(body).hexdigest()[:16] if body else None
+    return f"{method.upper()} {normalized} {body_hash or '-'}"
+
+
+def _open_cassette(path):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Sends requests over the network and appends each request/response pair to a
+    JSONL cassette (gzip-compressed if the path ends in .gz). Request headers are
+    never recorded, so credentials stay out of the cassette. Each compressed entry
+    is written as its own gzip member, so the cassette stays readable after an
+    unclean exit.
+    """
+    def __init__(self, cassette_path, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette_path = cassette_path
+        self._compress = cassette_path.endswith(".gz")
+        self._lock = threading.Lock()
+        self._file = open(cassette_path, "ab")
+
+    def send(self, request, **kwargs):
+        started = time.monotonic()
+        response = super().send(request, **kwargs)
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+
+        content = response.content
+        try:
+            body, encoding = content.decode("utf-8"), None
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode("ascii"), "b64"
+        entry = {
+            "k": request_key(request.method, request.url, request.body),
+            "s": response.status_code,
+            "h": {k: v for k, v in response.headers.items()
+                  if k.lower() in RECORDED_HEADERS or k.lower().startswith(RECORDED_HEADER_PREFIXES)},
+            "c": body,
+            "ms": elapsed_ms,
+        }
+        if encoding:
+            entry["e"] = encoding
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            self._file.write(gzip.compress(line) if self._compress else line)
+            self._file.flush()
+        return response
+
+    def close(self):
+        super().close()
+        with self._lock:
+            self._file.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves responses from a cassette without touching the network.
+    Repeated requests cycle through their recorded responses. Latency can be the
+    recorded one or a fixed value plus jitter, and a fraction of requests can be
+    failed with a synthetic error status to exercise retry and rate-limit paths.
+    All state is in memory and guarded by a lock, so one adapter can serve many
+    threads concurrently.
+    """
+    def __init__(self, cassette_path, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503, seed=None):
+        super().__init__()
+        self.cassette_path = cassette_path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._entries = {}
+        # A recording interrupted mid-write leaves a truncated final line (plain) or gzip member (.gz)
+        truncated = False
+        with _open_cassette(cassette_path) as f:
+            try:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    if truncated:
+                        raise ValueError("undecodable entry before the end of the cassette")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        truncated = True
+                        continue
+                    self._entries.setdefault(entry["k"], []).append(entry)
+            except EOFError:
+                truncated = True
+        if truncated:
+            click.echo(f"Warning: Cassette {cassette_path} ends with an incomplete entry. Ignoring it.", err=True)
+
+    def _next(self, key):
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None, False
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            inject_error = self.error_rate > 0 and self._random.random() < self.error_rate
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        entry = entries[position % len(entries)]
+        latency = entry.get("ms", 0) if self.latency_ms == "recorded" else self.latency_ms
+        delay = max(0.0, (latency + jitter) / 1000.0)
+        if delay:
+            time.sleep(delay)
+        return entry, inject_error
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url, request.body)
+        entry, inject_error = self._next(key)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"No recorded response for {key}", request=request)
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.connection = self
+        if inject_error:
+            response.status_code = self.error_status
+            response.headers = CaseInsensitiveDict({"Retry-After": "1"} if self.error_status == 429 else {})
+            response._content = b""
+        else:
+            response.status_code = entry["s"]
+            response.headers = CaseInsensitiveDict(entry["h"])
+            response._content = base64.b64decode(entry["c"]) if entry.get("e") == "b64" else entry["c"].encode("utf-8")
+        try:
+            response.reason = HTTPStatus(response.status_code).phrase
+        except ValueError:
+            response.reason = ""
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+class UnavailableAdapter(BaseAdapter):
+    """
+    Fails every request. Mounted when HTTP_TRANSPORT is configured but unusable, so
+    that a mistyped cassette path never sends real requests to GitHub or Jira.
+    """
+    def __init__(self, reason):
+        super().__init__()
+        self.reason = reason
+
+    def send(self, request, **kwargs):
+        raise requests.exceptions.ConnectionError(
+            f"HTTP transport unavailable ({self.reason}); refusing {request.method} {request.url}", request=request)
+
+    def close(self):
+        pass
+
+
+def get_transport_adapter():
+    """
+    Returns the shared record/replay adapter configured under HTTP_TRANSPORT in the
+    config file, or None when requests should go to the network as usual, e.g.
+    {"mode": "replay", "cassette": "run.jsonl.gz", "latency_ms": 80, "jitter_ms": 20,
+     "error_rate": 0.02, "error_status": 429, "seed": 1}.
+    `latency_ms` may also be "recorded" to replay the latency observed while recording.
+    A configured transport that cannot be used never falls back to the network;
+    an UnavailableAdapter that fails every request is returned instead.
+    """
+    settings = ConfigManager().get_value("HTTP_TRANSPORT") or {}
+    mode, cassette = settings.get("mode"), settings.get("cassette")
+    if not mode and not cassette:
+        return None
+    with _adapters_lock:
+        cache_key = (mode, cassette)
+        if cache_key not in _adapters:
+            try:
+                if not mode or not cassette:
+                    raise ValueError("both 'mode' and 'cassette' must be set")
+                if mode == MODE_RECORD:
+                    _adapters[cache_key] = RecordingAdapter(cassette)
+                elif mode == MODE_REPLAY:
+                    _adapters[cache_key] = ReplayAdapter(
+                        cassette,
+                        latency_ms=settings.get("latency_ms", 0),
+                        jitter_ms=settings.get("jitter_ms", 0),
+                        error_rate=settings.get("error_rate", 0.0),
+                        error_status=settings.get("error_status", 503),
+                        seed=settings.get("seed"),
+                    )
+                else:
+                    raise ValueError(f"unknown mode '{mode}'")
+                click.echo(f"HTTP transport: {mode} ({cassette})", err=True)
+            except (OSError, EOFError, KeyError, ValueError) as e:
+                click.echo(f"Error: HTTP_TRANSPORT cannot be used ({cassette}: {e}). All GitHub and Jira requests will fail.", err=True)
+                _adapters[cache_key] = UnavailableAdapter(str(e))
+        return _adapters[cache_key]
+
+
+def install_transport(session):
+    """Mounts the configured record/replay adapter on a requests session. Returns True if one was mounted."""
+    adapter = get_transport_adapter()
+    if adapter is None:
+        return False
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return True